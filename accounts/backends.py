@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend que carrega o usuário da sessão já com a empresa e o
+    candidato (select_related), em uma única consulta por requisição.
+    Perfis inexistentes também ficam em cache, então os testes de papel
+    (accounts.roles, user.company em templates) não consultam o banco.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related('company', 'candidate').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
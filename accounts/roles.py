@@ -0,0 +1,19 @@
+"""
+Papel do usuário: empresa, candidato ou nenhum (visitantes, administradores).
+
+Use estas funções em vez de hasattr(user, 'company'). Com
+accounts.backends.ProfileBackend os perfis vêm junto com request.user,
+que o AuthenticationMiddleware guarda na requisição, e nada é consultado.
+As flags User.is_company/is_candidate não são usadas: usuários criados
+fora dos formulários de cadastro podem ter o perfil sem a flag.
+"""
+
+
+def company_of(user):
+    """Empresa do usuário, ou None."""
+    return getattr(user, 'company', None)
+
+
+def candidate_of(user):
+    """Candidato do usuário, ou None."""
+    return getattr(user, 'candidate', None)
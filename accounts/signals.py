@@ -0,0 +1,18 @@
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.dispatch import receiver
+
+from jobconvo_enock import metrics
+
+LOGINS = metrics.Counter('accounts_logins_total', 'Logins bem-sucedidos.')
+LOGIN_FAILURES = metrics.Counter('accounts_login_failures_total', 'Tentativas de login recusadas.')
+SIGNUPS = metrics.Counter('accounts_signups_total', 'Cadastros concluídos, por tipo de conta.', ['role'])
+
+
+@receiver(user_logged_in)
+def count_login(sender, request, user, **kwargs):
+    LOGINS.inc()
+
+
+@receiver(user_login_failed)
+def count_login_failure(sender, credentials, **kwargs):
+    LOGIN_FAILURES.inc()
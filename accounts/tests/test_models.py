@@ -1,5 +1,10 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
 from django.test import TestCase
+from django.urls import reverse
+from accounts.backends import ProfileBackend
 from accounts.models import User, Company, Candidate
+from accounts.roles import candidate_of, company_of
 
 class UserModelTest(TestCase):
     """
@@ -100,4 +105,45 @@ class CandidateModelTest(TestCase):
         user_id = self.user.id
         self.user.delete()
         with self.assertRaises(Candidate.DoesNotExist):
-            Candidate.objects.get(user_id=user_id)
\ No newline at end of file
+            Candidate.objects.get(user_id=user_id)
+
+class ProfileBackendTest(TestCase):
+    """
+    Testa o carregamento dos perfis junto com o usuário da sessão.
+    """
+    def test_roles_resolved_without_queries(self):
+        """
+        Empresa e candidato (inclusive ausentes) vêm na mesma consulta do usuário.
+        """
+        company_user = User.objects.create_user(email='empresa@email.com', password='password123')
+        company = Company.objects.create(user=company_user, name='Empresa')
+        candidate_user = User.objects.create_user(email='candidato@email.com', password='password123')
+        candidate = Candidate.objects.create(user=candidate_user)
+
+        backend = ProfileBackend()
+        with self.assertNumQueries(1):
+            user = backend.get_user(company_user.pk)
+            self.assertEqual(company_of(user), company)
+            self.assertIsNone(candidate_of(user))
+        with self.assertNumQueries(1):
+            user = backend.get_user(candidate_user.pk)
+            self.assertIsNone(company_of(user))
+            self.assertEqual(candidate_of(user), candidate)
+
+        self.assertIsNone(company_of(AnonymousUser()))
+        User.objects.filter(pk=company_user.pk).update(is_active=False)
+        self.assertIsNone(backend.get_user(company_user.pk))
+
+    def test_sessions_of_model_backend_still_resolve(self):
+        """
+        Sessões abertas com o ModelBackend continuam válidas; logins novos usam o ProfileBackend.
+        """
+        user = User.objects.create_user(email='empresa@email.com', password='password123')
+        Company.objects.create(user=user, name='Empresa')
+
+        self.client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('jobs:job_create')).status_code, 200)
+
+        self.client.logout()
+        self.client.login(email='empresa@email.com', password='password123')
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'accounts.backends.ProfileBackend')
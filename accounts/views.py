@@ -4,6 +4,7 @@ from django.contrib.auth import login
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from .forms import CompanySignUpForm, CandidateSignUpForm
+from .signals import SIGNUPS
 
 def redirect_if_logged_in(view_func):
     """
@@ -21,6 +22,7 @@ def redirect_if_logged_in(view_func):
 class CompanySignUpView(View):
     form_class = CompanySignUpForm
     template_name = 'accounts/company_signup.html'
+    role = 'company'
 
     def get(self, request, *args, **kwargs):
         form = self.form_class()
@@ -30,7 +32,8 @@ class CompanySignUpView(View):
         form = self.form_class(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user)
+            SIGNUPS.inc(role=self.role)
+            login(request, user, backend='accounts.backends.ProfileBackend')
             return redirect('jobs:job_list')
         return render(request, self.template_name, {'form': form})
 
@@ -38,6 +41,7 @@ class CompanySignUpView(View):
 class CandidateSignUpView(View):
     form_class = CandidateSignUpForm
     template_name = 'accounts/candidate_signup.html'
+    role = 'candidate'
 
     def get(self, request, *args, **kwargs):
         form = self.form_class()
@@ -47,6 +51,7 @@ class CandidateSignUpView(View):
         form = self.form_class(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user)
+            SIGNUPS.inc(role=self.role)
+            login(request, user, backend='accounts.backends.ProfileBackend')
             return redirect('jobs:job_list')
         return render(request, self.template_name, {'form': form})
\ No newline at end of file
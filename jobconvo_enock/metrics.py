@@ -0,0 +1,407 @@
+"""
+Métricas da aplicação no formato de texto do Prometheus, servidas em /metrics.
+
+Cada processo acumula seus valores em memória (um dict protegido por lock,
+então registrar um valor custa uma soma). Com settings.METRICS['dir']
+definido, cada processo grava periodicamente seus valores em
+`<dir>/<pid>-<id único>.json` e o /metrics soma os arquivos de todos os
+processos, o que agrega os workers do gunicorn. Um pid reaproveitado ganha
+um arquivo novo em vez de sobrescrever o do worker morto. Na primeira
+gravação, cada processo incorpora aos seus valores os arquivos de processos
+que já saíram e os apaga: os contadores não voltam atrás e o diretório não
+cresce a cada reinício. O diretório deve ser local à máquina (os pids
+são conferidos com os processos dela).
+
+O /metrics é fechado por padrão: só responde com o token configurado ou a
+endereços de settings.METRICS['allowed_ips'].
+
+Uso:
+
+    SIGNUPS = metrics.Counter('accounts_signups_total', 'Cadastros concluídos.', ['role'])
+    SIGNUPS.inc(role='company')
+"""
+import atexit
+import bisect
+import ipaddress
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+DEFAULTS = {
+    'enabled': True,
+    # Diretório compartilhado pelos processos; None mantém as métricas só em memória.
+    'dir': None,
+    'flush_interval': 1.0,
+    # Com token, /metrics aceita "Authorization: Bearer <token>"; sem token
+    # (ou sem o cabeçalho) só atende os endereços/redes de allowed_ips.
+    'token': None,
+    'allowed_ips': (),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.config = None
+        self.reset()
+
+    def reset(self):
+        # (nome, valores dos rótulos) -> lista de números (1 para contadores; buckets, soma e contagem para histogramas).
+        self.values = {}
+        self.pid = os.getpid()
+        self.name = f'{self.pid}-{uuid.uuid4().hex}'
+        # Arquivos de processos mortos já somados em self.values (ainda não apagados).
+        self.adopted = set()
+        self.flushed = False
+        self.last_flush = time.monotonic()
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Métrica duplicada: {metric.name}')
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add(self, name, labels, increments, size=1):
+        """Soma cada (posição, valor) de `increments` à série (name, labels)."""
+        if self.config is None:
+            self.configure()
+        with self.lock:
+            if self.pid != os.getpid():
+                # Processo filho após fork (gunicorn --preload): os valores herdados são do pai.
+                self.reset()
+            values = self.values.get((name, labels))
+            if values is None:
+                values = self.values[name, labels] = [0] * size
+            for index, amount in increments:
+                values[index] += amount
+            flush = self.directory is not None and time.monotonic() - self.last_flush >= self.flush_interval
+        if flush:
+            self.flush()
+
+    def configure(self):
+        config = get_config()
+        self.flush_interval = config['flush_interval']
+        self.directory = Path(config['dir']) if config['dir'] else None
+        self.flushed = False
+        self.config = config
+
+    def flush(self):
+        """Grava os valores deste processo em <dir>/<nome>.json, de forma atômica."""
+        self.last_flush = time.monotonic()
+        if self.config is None:
+            self.configure()
+        directory = self.directory
+        if directory is None:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.pid != os.getpid():
+            with self.lock:
+                self.reset()
+        claimed = [] if self.flushed else self.adopt_dead(directory)
+        with self.lock:
+            data = {'rows': self._rows(), 'adopted': sorted(self.adopted)}
+        path = directory / f'{self.name}.json'
+        tmp = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, path)
+        self.flushed = True
+        # Só depois que o arquivo deste processo os lista como incorporados.
+        for claimed_path in claimed:
+            claimed_path.unlink(missing_ok=True)
+        with self.lock:
+            self.adopted.difference_update(path.name for path in claimed)
+
+    def adopt_dead(self, directory):
+        """
+        Soma aos valores deste processo os arquivos de processos que já saíram.
+        Cada arquivo é antes renomeado para um nome deste processo (só um
+        processo vence o rename) e continua contando no /metrics até ser
+        listado em "adopted" no arquivo deste processo. Devolve os arquivos
+        a apagar depois da gravação.
+        """
+        files = _read_files(directory)
+        dead = {name for name in files if not _process_alive(name, self.name)}
+        # Já incorporados por um processo vivo: ele mesmo os apaga.
+        owned_by_live = {listed for name, (_, adopted) in files.items() if name not in dead for listed in adopted}
+        # Já incorporados por um processo morto: os valores vêm no arquivo dele, só apagamos.
+        listed_by_dead = {listed for name in dead for listed in files[name][1]}
+        claimed = []
+        for name in sorted(dead - owned_by_live):
+            target = directory / f'{self.name}.{name}'
+            try:
+                os.rename(directory / name, target)
+            except OSError:
+                # Outro processo chegou antes.
+                continue
+            claimed.append(target)
+            with self.lock:
+                if name not in listed_by_dead:
+                    for row_name, labels, values in files[name][0]:
+                        current = self.values.setdefault((row_name, tuple(labels)), [0] * len(values))
+                        current.extend([0] * (len(values) - len(current)))
+                        for i, value in enumerate(values):
+                            current[i] += value
+                self.adopted.add(target.name)
+        return claimed
+
+    def _rows(self):
+        return [(name, list(labels), list(values)) for (name, labels), values in self.values.items()]
+
+    def collect(self):
+        """Soma os valores de todos os processos; os deste processo vêm direto da memória."""
+        if self.config is None:
+            self.configure()
+        totals = defaultdict(list)
+        with self.lock:
+            rows = self._rows()
+            skip = {f'{self.name}.json', *self.adopted}
+        directory = self.directory
+        if directory is not None and directory.is_dir():
+            files = _read_files(directory)
+            for _, adopted in files.values():
+                skip.update(adopted)
+            for name, (file_rows, _) in files.items():
+                if name not in skip:
+                    rows.extend(file_rows)
+        for name, labels, values in rows:
+            key = (name, tuple(labels))
+            total = totals[key]
+            if len(total) < len(values):
+                total.extend([0] * (len(values) - len(total)))
+            for i, value in enumerate(values):
+                total[i] += value
+        return totals
+
+    def exposition(self):
+        totals = self.collect()
+        by_metric = defaultdict(list)
+        for (name, labels), values in sorted(totals.items()):
+            by_metric[name].append((labels, values))
+
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for labels, values in by_metric.get(name, []):
+                lines.extend(metric.samples(dict(zip(metric.labelnames, labels)), values))
+        return '\n'.join(lines) + '\n'
+
+
+def _read_files(directory):
+    """{nome do arquivo: (linhas, arquivos incorporados)} de cada processo no diretório."""
+    files = {}
+    for path in directory.glob('*.json'):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, list):
+            # Formato antigo: só as linhas.
+            data = {'rows': data}
+        files[path.name] = (data.get('rows', []), data.get('adopted', []))
+    return files
+
+
+def _process_alive(file_name, own_name):
+    """
+    Se o processo dono do arquivo ainda roda. O pid é o início do nome; um
+    arquivo com o pid deste processo e outro id é de um processo morto cujo
+    pid foi reaproveitado.
+    """
+    if file_name == f'{own_name}.json':
+        return True
+    try:
+        pid = int(file_name.split('.')[0].split('-')[0])
+    except ValueError:
+        return True
+    if pid == os.getpid():
+        return False
+    if os.name != 'posix':
+        # Sem como conferir com segurança (os.kill encerraria o processo no Windows).
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+REGISTRY = Registry()
+atexit.register(lambda: REGISTRY.values and REGISTRY.flush())
+
+
+def _reconfigure(setting, **kwargs):
+    if setting == 'METRICS':
+        REGISTRY.configure()
+
+
+setting_changed.connect(_reconfigure)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        registry.register(self)
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} espera os rótulos {self.labelnames}, recebeu {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.name, self._labels(labels), ((0, amount),))
+
+    def samples(self, labels, values):
+        return [f'{self.name}{_format_labels(labels)} {_format_value(values[0])}']
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        # Cada observação soma em um só bucket (o acumulado é feito na exposição),
+        # mais a soma e a contagem: [buckets..., +Inf, soma, contagem].
+        size = len(self.buckets) + 3
+        increments = ((bisect.bisect_left(self.buckets, value), 1), (size - 2, value), (size - 1, 1))
+        self.registry.add(self.name, self._labels(labels), increments, size)
+
+    def samples(self, labels, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), values):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _format_value(bound)
+            lines.append(f'{self.name}_bucket{_format_labels({**labels, "le": le})} {_format_value(cumulative)}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(values[-2])}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {_format_value(values[-1])}')
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Tempo de resposta por URL nomeada.', ['view', 'method']
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_queries', 'Consultas SQL por requisição, por URL nomeada.', ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Latência e número de consultas de cada requisição, rotuladas pelo nome da URL (ex.: jobs:job_list).
+
+    Funciona também em modo async, para não obrigar o Django a rodar as views
+    async em threads sob ASGI. Nesse modo as consultas saem por conexões de
+    outras threads e não são contadas; só a latência é registrada.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_config()['enabled']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        view = self.observe(request, time.perf_counter() - started)
+        REQUEST_QUERIES.observe(counter.count, view=view)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        # URLs não resolvidas (404) ficam em um único rótulo para não explodir a cardinalidade.
+        view = match.view_name if match and match.url_name else 'unresolved'
+        REQUEST_LATENCY.observe(elapsed, view=view, method=request.method)
+        return view
+
+
+def _allowed_address(address, allowed):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in allowed)
+
+
+def metrics_view(request):
+    config = get_config()
+    token = config['token']
+    authorized = token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not authorized and not _allowed_address(request.META.get('REMOTE_ADDR', ''), config['allowed_ips']):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
@@ -0,0 +1,172 @@
+"""
+Perfil por requisição, ligado em settings.REQUEST_PROFILING.
+
+Para cada requisição o middleware mede o tempo total, o número e o tempo
+acumulado das consultas SQL (connection.execute_wrapper), o tempo de
+renderização dos templates e, opcionalmente, o pico de memória alocada, e
+devolve tudo no cabeçalho Server-Timing (visível no DevTools do navegador)
+e no logger "jobconvo_enock.profiling". Uma fração das requisições pode
+rodar sob o cProfile; as que passarem do limite têm o perfil gravado em um
+diretório que guarda só os arquivos mais recentes.
+
+Desligado, o middleware se remove da pilha (MiddlewareNotUsed) e não custa nada.
+"""
+import cProfile
+import logging
+import random
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'enabled': False,
+    # Pico de memória via tracemalloc: deixa as requisições bem mais lentas.
+    'trace_memory': False,
+    # Fração das requisições executadas sob o cProfile (0 desliga).
+    'profile_rate': 0.0,
+    'profile_threshold_ms': 500,
+    'profile_dir': 'profiles',
+    'profile_keep': 50,
+}
+
+_current = ContextVar('request_profile', default=None)
+_memory_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_PROFILING', {})}
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.render_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return render(self, *args, **kwargs)
+        # Templates renderizados dentro de outro (render_to_string em tags) não contam duas vezes.
+        profile.render_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.render_depth -= 1
+            if not profile.render_depth:
+                profile.render_time += time.perf_counter() - started
+    wrapper.profiled = True
+    return wrapper
+
+
+def instrument_templates():
+    """Mede django.template.backends.django.Template.render, usado por render() e TemplateResponse."""
+    template = django_backend.Template
+    if not getattr(template.render, 'profiled', False):
+        template.render = _timed_render(template.render)
+
+
+class RequestProfilingMiddleware:
+    def __init__(self, get_response):
+        config = get_config()
+        if not config['enabled']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.trace_memory = config['trace_memory']
+        self.profile_rate = config['profile_rate']
+        self.profile_threshold = config['profile_threshold_ms']
+        self.profile_dir = Path(config['profile_dir'])
+        self.profile_keep = config['profile_keep']
+        instrument_templates()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        # tracemalloc é global ao processo: só uma requisição por vez mede memória.
+        trace_memory = self.trace_memory and not tracemalloc.is_tracing() and _memory_lock.acquire(blocking=False)
+        profiler = cProfile.Profile() if self.profile_rate and random.random() < self.profile_rate else None
+        peak = None
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                if trace_memory:
+                    tracemalloc.start()
+                if profiler:
+                    profiler.enable()
+                started = time.perf_counter()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    elapsed = time.perf_counter() - started
+                    if profiler:
+                        profiler.disable()
+                    if trace_memory:
+                        _, peak = tracemalloc.get_traced_memory()
+                        tracemalloc.stop()
+        finally:
+            if trace_memory:
+                _memory_lock.release()
+            _current.reset(token)
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        total_ms = elapsed * 1000
+        response['Server-Timing'] = self.server_timing(profile, total_ms, view_name, peak)
+        logger.info(
+            '%s %s view=%s total=%.1fms queries=%d sql=%.1fms render=%.1fms peak=%s',
+            request.method, request.path, view_name, total_ms, profile.queries,
+            profile.sql_time * 1000, profile.render_time * 1000, peak,
+        )
+        if profiler and total_ms >= self.profile_threshold:
+            self.save_profile(profiler, view_name or 'unresolved', total_ms)
+        return response
+
+    def server_timing(self, profile, total_ms, view_name, peak):
+        metrics = [
+            f'total;dur={total_ms:.1f}',
+            f'db;dur={profile.sql_time * 1000:.1f};desc="{profile.queries} queries"',
+            f'render;dur={profile.render_time * 1000:.1f}',
+        ]
+        if view_name:
+            metrics.append(f'view;desc="{view_name}"')
+        if peak is not None:
+            metrics.append(f'mem;desc="{peak / 1024:.0f} KiB peak"')
+        return ', '.join(metrics)
+
+    def save_profile(self, profiler, view_name, total_ms):
+        """Grava o perfil (abra com pstats ou snakeviz) e apaga os mais antigos que profile_keep."""
+        try:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            name = re.sub(r'[^\w.-]', '_', view_name)
+            profiler.dump_stats(self.profile_dir / f'{time.time():.6f}-{name}-{total_ms:.0f}ms.prof')
+            # O nome começa pelo timestamp, então a ordem alfabética é a cronológica.
+            dumps = sorted(self.profile_dir.glob('*.prof'))
+            for path in dumps[:-self.profile_keep]:
+                path.unlink()
+        except OSError:
+            # Um disco cheio não deve derrubar a requisição que está sendo medida.
+            logger.exception('Falha ao gravar o perfil de %s', view_name)
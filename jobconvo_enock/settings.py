@@ -44,6 +44,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'jobconvo_enock.metrics.MetricsMiddleware',
+    # Só fica ativo com REQUEST_PROFILING['enabled'] (veja o fim do arquivo).
+    'jobconvo_enock.profiling.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,7 +61,7 @@ ROOT_URLCONF = 'jobconvo_enock.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -81,11 +84,22 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Banco de testes em arquivo: o SQLite em memória recusa escritas
+        # concorrentes, e ConcurrentApplyTest precisa delas.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# Carrega a empresa/o candidato junto com o usuário da sessão (accounts.roles).
+# O ModelBackend continua na lista para as sessões abertas antes dele, que
+# guardam o caminho desse backend; logins novos passam pelo ProfileBackend.
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 LOGIN_REDIRECT_URL = 'jobs:job_list'
 LOGOUT_REDIRECT_URL = 'accounts:login'
 
@@ -126,7 +140,6 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 import os
-TEMPLATES[0]['DIRS'] = [os.path.join(BASE_DIR, 'templates')]
 STATIC_URL = '/static/'
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -140,4 +153,53 @@ STATICFILES_DIRS = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-CRISPY_TEMPLATE_PACK = 'bootstrap4'
\ No newline at end of file
+# Os índices de jobs.Application usam INCLUDE (covering) no PostgreSQL; o SQLite
+# apenas ignora as colunas extras.
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
+CRISPY_TEMPLATE_PACK = 'bootstrap4'
+
+# Pesos da pontuação das candidaturas (campos de jobs.scoring.ScoringRules).
+# Vazio mantém o sistema padrão: +1 faixa salarial, +1 escolaridade.
+JOBS_SCORING_RULES = {}
+
+# Perfil por requisição (jobconvo_enock.profiling): cabeçalho Server-Timing com
+# tempo total, SQL e renderização. Ligue com REQUEST_PROFILING=1 no ambiente;
+# profile_rate > 0 grava perfis do cProfile das requisições acima do limite.
+REQUEST_PROFILING = {
+    'enabled': os.environ.get('REQUEST_PROFILING') == '1',
+    'trace_memory': False,
+    'profile_rate': 0.0,
+    'profile_threshold_ms': 500,
+    'profile_dir': BASE_DIR / 'profiles',
+    'profile_keep': 50,
+}
+
+# Métricas do Prometheus em /metrics (jobconvo_enock.metrics). Com vários
+# workers do gunicorn, aponte METRICS_DIR para um diretório local compartilhado
+# por eles. O endpoint só responde com METRICS_TOKEN ou aos endereços/redes de
+# METRICS_ALLOWED_IPS (separados por vírgula).
+METRICS = {
+    'enabled': True,
+    'dir': os.environ.get('METRICS_DIR'),
+    'flush_interval': 1.0,
+    'token': os.environ.get('METRICS_TOKEN'),
+    'allowed_ips': [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip.strip()],
+}
+
+# Cache dos relatórios e da lista pública de vagas (jobs.board). O LocMemCache
+# é por processo; com vários workers, defina REDIS_URL para compartilhar o
+# cache entre eles (requer o pacote redis).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
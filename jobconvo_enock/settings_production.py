@@ -0,0 +1,36 @@
+"""
+Settings de produção: DJANGO_SETTINGS_MODULE=jobconvo_enock.settings_production.
+
+Herda settings.py e troca o que só serve em desenvolvimento: DEBUG
+desligado, SECRET_KEY e ALLOWED_HOSTS vindos do ambiente e os templates
+lidos do disco e compilados uma única vez por processo pelo cached.Loader.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import ALLOWED_HOSTS, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+if os.environ.get('DJANGO_ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.environ['DJANGO_ALLOWED_HOSTS'].split(',')
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        # Com 'loaders' explícitos o Django exige APP_DIRS desligado.
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'debug': False,
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
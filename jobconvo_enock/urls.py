@@ -17,9 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('accounts/', include(('accounts.urls', 'accounts'), namespace='accounts')),
     path('', include('jobs.urls')),
     path('', RedirectView.as_view(pattern_name='jobs:job_list', permanent=False)),
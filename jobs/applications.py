@@ -0,0 +1,295 @@
+"""
+Criação de candidaturas.
+
+submit() é a única forma de uma candidatura entrar pelas views: o INSERT é
+tentado direto, dentro de um savepoint, e a restrição única (job, candidate)
+decide quem ganha em envios simultâneos. O perdedor recebe a candidatura já
+existente em vez de um IntegrityError.
+"""
+import csv
+import io
+import json
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import Candidate
+from . import board, reports
+from .models import Application, Job
+from .scoring import score_many
+from .signals import APPLICATIONS_CREATED
+
+
+def submit(job, candidate, salary_expectation, candidate_last_education, candidate_experience=''):
+  """
+  Cria a candidatura de `candidate` para `job` e devolve (candidatura, criada).
+  Em um envio repetido devolve a candidatura existente, sem alterá-la.
+  `job` deve ser a instância já carregada: a pontuação e os signals a usam
+  sem consultar a vaga de novo.
+  """
+  application = Application(
+    job=job,
+    candidate=candidate,
+    salary_expectation=salary_expectation,
+    candidate_last_education=candidate_last_education,
+    candidate_experience=candidate_experience,
+  )
+  try:
+    with transaction.atomic():
+      application.save(force_insert=True)
+  except IntegrityError:
+    existing = Application.objects.filter(job=job, candidate=candidate).first()
+    if existing is None:
+      # Outra restrição violada: não é uma candidatura repetida.
+      raise
+    existing.job = job
+    return existing, False
+  return application, True
+
+
+# Importação em lote (upload em ImportApplicationsView e `manage.py import_applications`).
+
+IMPORT_FIELDS = ('job_id', 'email', 'salary_expectation', 'candidate_last_education',
+                 'candidate_experience', 'created_at')
+
+# Acima disso só o total de erros é contado, para um arquivo todo inválido não ocupar a memória.
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportResult:
+  def __init__(self):
+    self.created = 0
+    self.duplicates = 0
+    self.error_count = 0
+    self.errors = []
+
+  def error(self, line, message):
+    self.error_count += 1
+    if len(self.errors) < MAX_REPORTED_ERRORS:
+      self.errors.append((line, message))
+
+
+def read_rows(stream, format):
+  """
+  Gera (linha, dict) de um arquivo de texto CSV (com cabeçalho) ou JSONL,
+  uma linha por vez. Linhas de JSONL inválidas viram um dict com a chave
+  '__error__', reportada como erro da linha.
+  """
+  if format == 'csv':
+    reader = csv.DictReader(stream)
+    for row in reader:
+      yield reader.line_num, row
+  elif format == 'jsonl':
+    for line, text in enumerate(stream, start=1):
+      if not text.strip():
+        continue
+      try:
+        row = json.loads(text)
+      except ValueError as error:
+        row = {'__error__': f'JSON inválido: {error}'}
+      if not isinstance(row, dict):
+        row = {'__error__': 'Cada linha deve ser um objeto JSON.'}
+      yield line, row
+  else:
+    raise ValueError(f'Formato desconhecido: {format!r} (use csv ou jsonl).')
+
+
+def import_applications(company, rows, chunk_size=1000):
+  """
+  Importa candidaturas para vagas de `company` a partir de (linha, dict)
+  como os de read_rows, em blocos de `chunk_size` linhas: cada bloco faz
+  uma consulta para as vagas, uma para os candidatos (por email) e uma
+  para as candidaturas já existentes, pontua tudo com score_many e grava
+  com um bulk_create em uma transação. Devolve um ImportResult.
+  """
+  result = ImportResult()
+  chunk = []
+  for line, row in rows:
+    chunk.append((line, row))
+    if len(chunk) >= chunk_size:
+      _import_chunk(company, chunk, result)
+      chunk = []
+  if chunk:
+    _import_chunk(company, chunk, result)
+  return result
+
+
+def _clean(field_name, value):
+  return Application._meta.get_field(field_name).clean(value, None)
+
+
+def _parse_created_at(value):
+  if not value:
+    return timezone.now()
+  created_at = parse_datetime(value) if isinstance(value, str) else None
+  if created_at is None:
+    raise ValidationError('Data inválida (use ISO 8601, ex.: 2025-01-31T10:00:00).')
+  if timezone.is_naive(created_at):
+    created_at = timezone.make_aware(created_at)
+  return created_at
+
+
+def _import_chunk(company, chunk, result):
+  job_ids = set()
+  emails = set()
+  for _, row in chunk:
+    try:
+      job_ids.add(int(row.get('job_id')))
+    except (TypeError, ValueError):
+      pass
+    emails.add(str(row.get('email') or '').strip())
+
+  jobs = {job.pk: job for job in Job.objects.filter(company=company, pk__in=job_ids)}
+  candidates = {
+    candidate.user.email: candidate
+    for candidate in Candidate.objects.filter(user__email__in=emails).select_related('user')
+  }
+
+  applications = []
+  seen = set()
+  for line, row in chunk:
+    if '__error__' in row:
+      result.error(line, row['__error__'])
+      continue
+    try:
+      job = jobs.get(int(row.get('job_id')))
+    except (TypeError, ValueError):
+      job = None
+    if job is None:
+      result.error(line, f"Vaga {row.get('job_id')!r} não encontrada entre as vagas da empresa.")
+      continue
+    candidate = candidates.get(str(row.get('email') or '').strip())
+    if candidate is None:
+      result.error(line, f"Nenhum candidato com o email {row.get('email')!r}.")
+      continue
+    try:
+      application = Application(
+        job=job,
+        candidate=candidate,
+        salary_expectation=_clean('salary_expectation', row.get('salary_expectation')),
+        candidate_last_education=_clean('candidate_last_education',
+                                        row.get('candidate_last_education') or candidate.last_education),
+        candidate_experience=str(row.get('candidate_experience') or candidate.experience),
+        created_at=_parse_created_at(row.get('created_at')),
+      )
+    except ValidationError as error:
+      result.error(line, '; '.join(error.messages))
+      continue
+    if (job.pk, candidate.pk) in seen:
+      result.duplicates += 1
+      continue
+    seen.add((job.pk, candidate.pk))
+    applications.append(application)
+
+  existing = set(Application.objects
+                 .filter(job__in=list(jobs), candidate__in=[a.candidate_id for a in applications])
+                 .values_list('job_id', 'candidate_id'))
+  new = [a for a in applications if (a.job_id, a.candidate_id) not in existing]
+  result.duplicates += len(applications) - len(new)
+  if not new:
+    return
+
+  for application, score in zip(new, score_many(new)):
+    application.score = score
+
+  # bulk_create não dispara os signals: contador, estatísticas e métricas são somados
+  # aqui, só para as candidaturas realmente inseridas.
+  with transaction.atomic():
+    inserted = _insert(new)
+    result.duplicates += len(new) - len(inserted)
+    new = inserted
+    if not new:
+      return
+    per_job = Counter(a.job_id for a in new)
+    for job_id, total in per_job.items():
+      Job.objects.filter(pk=job_id).update(applications_count=F('applications_count') + total)
+    per_month = {}
+    for application in new:
+      # Uma data de exemplo por mês basta: record() agrupa pelo mês dela.
+      month = reports.month_start(application.created_at)
+      sample, total = per_month.get(month, (application.created_at, 0))
+      per_month[month] = (sample, total + 1)
+    for created_at, total in per_month.values():
+      reports.record(company.pk, created_at, 'applications_count', total)
+    board.bump_version()
+  for application in new:
+    APPLICATIONS_CREATED.inc(score=application.score)
+  result.created += len(new)
+
+
+def _insert(applications):
+  """
+  Grava as candidaturas e devolve as realmente inseridas. O caso comum é um
+  único bulk_create em um savepoint; se alguma delas tiver sido criada em
+  paralelo depois da consulta de existentes, a restrição única desfaz o
+  savepoint e as linhas são inseridas uma a uma, cada uma no seu savepoint,
+  como em submit().
+  """
+  try:
+    with transaction.atomic():
+      Application.objects.bulk_create(applications)
+    return applications
+  except IntegrityError:
+    pass
+
+  inserted = []
+  for application in applications:
+    try:
+      with transaction.atomic():
+        Application.objects.bulk_create([application])
+    except IntegrityError:
+      if not Application.objects.filter(job_id=application.job_id, candidate_id=application.candidate_id).exists():
+        raise
+      continue
+    inserted.append(application)
+  return inserted
+
+
+# Exportação (views export_job_applications e export_applications). As colunas
+# de IMPORT_FIELDS vêm na mesma forma da importação: o arquivo pode ser reimportado.
+
+EXPORT_FIELDS = ('job_id', 'job_title', 'email', 'salary_expectation', 'candidate_last_education',
+                 'candidate_experience', 'score', 'created_at')
+EXPORT_COLUMNS = ('job_id', 'job__title', 'candidate__user__email', 'salary_expectation',
+                  'candidate_last_education', 'candidate_experience', 'score', 'created_at')
+
+
+def export_rows(applications, format, chunk_size=2000):
+  """
+  Gera o CSV (com cabeçalho) ou JSONL das candidaturas em pedaços de texto
+  de até `chunk_size` linhas. As linhas vêm de values_list().iterator(),
+  sem instanciar modelos nem guardar o queryset: a memória não cresce com
+  o total exportado.
+  """
+  if format not in ('csv', 'jsonl'):
+    raise ValueError(f'Formato desconhecido: {format!r} (use csv ou jsonl).')
+
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  if format == 'csv':
+    writer.writerow(EXPORT_FIELDS)
+    # O cabeçalho sai antes da consulta: o download começa de imediato.
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+  rows = applications.values_list(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+  for count, row in enumerate(rows, start=1):
+    *values, created_at = row
+    values.append(created_at.isoformat())
+    if format == 'csv':
+      writer.writerow(values)
+    else:
+      buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, values)), cls=DjangoJSONEncoder, ensure_ascii=False))
+      buffer.write('\n')
+    if count % chunk_size == 0:
+      yield buffer.getvalue()
+      buffer.seek(0)
+      buffer.truncate()
+  if buffer.tell():
+    yield buffer.getvalue()
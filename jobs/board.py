@@ -0,0 +1,70 @@
+"""
+Cache da lista pública de vagas (JobListView e JobSearchView), em duas camadas:
+
+- a página de vagas (CursorPage) de cada combinação de cursor e filtros,
+  igual para todos os usuários;
+- o HTML inteiro da resposta para visitantes anônimos, que recebem todos
+  a mesma página.
+
+Como nos relatórios, as chaves incluem uma versão global que muda a cada
+vaga criada, alterada ou removida e a cada candidatura criada ou removida
+(o contador de candidatos aparece na lista): jobs.signals e as escritas em
+lote chamam bump_version(), e nada precisa ser apagado.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from jobconvo_enock import metrics
+
+CACHE_TIMEOUT = 60 * 10
+VERSION_KEY = 'board:version'
+
+CACHE_REQUESTS = metrics.Counter(
+  'jobs_board_cache_requests_total', 'Consultas ao cache da lista pública de vagas, por camada.',
+  ['layer', 'result']
+)
+
+
+def version():
+  version = cache.get(VERSION_KEY)
+  if version is None:
+    # Começar do relógio garante uma versão nova se a chave tiver sido despejada do cache.
+    version = int(time.time() * 1000)
+    if not cache.add(VERSION_KEY, version, None):
+      version = cache.get(VERSION_KEY, version)
+  return version
+
+
+def _incr_version():
+  try:
+    cache.incr(VERSION_KEY)
+  except ValueError:
+    version()
+
+
+def bump_version():
+  """
+  Invalida a lista depois do commit: antes dele, uma requisição poderia
+  guardar os dados antigos sob a versão nova.
+  """
+  transaction.on_commit(_incr_version)
+
+
+def key(view_name, params):
+  """Prefixo das chaves da view para os parâmetros da URL (QueryDict), na versão atual."""
+  items = sorted((name, tuple(params.getlist(name))) for name in params)
+  digest = hashlib.md5(repr(items).encode()).hexdigest()
+  return f'board:{view_name}:{version()}:{digest}'
+
+
+def get(key, layer):
+  value = cache.get(key)
+  CACHE_REQUESTS.inc(layer=layer, result='miss' if value is None else 'hit')
+  return value
+
+
+def set(key, value):
+  cache.set(key, value, CACHE_TIMEOUT)
@@ -7,6 +7,32 @@ class JobForm(forms.ModelForm):
     model = Job
     fields = ('title', 'salary_band', 'requirements', 'min_education')
 
+class JobSearchForm(forms.Form):
+  q = forms.CharField(label='Buscar', required=False, max_length=200,
+                      widget=forms.TextInput(attrs={'placeholder': 'Cargo, tecnologia, requisito...'}))
+  salary_band = forms.TypedChoiceField(label='Faixa Salarial', required=False, coerce=int, empty_value=None,
+                                       choices=[('', 'Todas as faixas')] + Job.SalaryBand.choices)
+  min_education = forms.TypedChoiceField(label='Escolaridade Mínima', required=False, coerce=int, empty_value=None,
+                                         choices=[('', 'Todas as escolaridades')] + Job.MinEducation.choices)
+
+class ApplicationImportForm(forms.Form):
+  FORMATS = [('', 'Pela extensão do arquivo'), ('csv', 'CSV'), ('jsonl', 'JSONL')]
+
+  file = forms.FileField(label='Arquivo',
+                         help_text='Colunas: job_id, email, salary_expectation e, opcionais, '
+                                   'candidate_last_education, candidate_experience, created_at.')
+  format = forms.ChoiceField(label='Formato', choices=FORMATS, required=False)
+
+  def clean(self):
+    cleaned_data = super().clean()
+    upload = cleaned_data.get('file')
+    if upload and not cleaned_data.get('format'):
+      extension = upload.name.rsplit('.', 1)[-1].lower()
+      if extension not in ('csv', 'jsonl'):
+        raise forms.ValidationError('Informe o formato: a extensão deve ser .csv ou .jsonl.')
+      cleaned_data['format'] = extension
+    return cleaned_data
+
 class ApplicationForm(forms.ModelForm):
   class Meta:
     model = Application
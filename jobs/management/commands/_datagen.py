@@ -0,0 +1,43 @@
+"""
+Geradores de linhas usados pelo populate_db.
+
+Rodam nos processos do pool de --workers, então não importam nada do
+Django: recebem a especificação do bloco e devolvem tuplas simples, que o
+processo principal transforma em objetos e grava.
+"""
+import random
+
+from faker import Faker
+
+
+def _generators(seed):
+  fake = Faker()
+  fake.seed_instance(seed)
+  return fake, random.Random(seed)
+
+
+def candidate_rows(spec):
+  """(email, última escolaridade, experiência) para os candidatos start..start+count."""
+  seed, start, count, education_choices = spec
+  fake, rng = _generators(seed)
+  return [
+    (f'candidate{i}.{fake.user_name()}@{fake.free_email_domain()}',
+     rng.choice(education_choices),
+     fake.text(max_nb_chars=200))
+    for i in range(start, start + count)
+  ]
+
+
+def job_rows(spec):
+  """(índice da empresa, título, faixa salarial, requisitos, escolaridade mínima, dias atrás)."""
+  seed, count, num_companies, salary_bands, education_choices = spec
+  fake, rng = _generators(seed)
+  return [
+    (rng.randrange(num_companies),
+     fake.job(),
+     rng.choice(salary_bands),
+     fake.text(max_nb_chars=200),
+     rng.choice(education_choices),
+     rng.randint(0, 365))
+    for _ in range(count)
+  ]
@@ -0,0 +1,311 @@
+import json
+import math
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import Candidate, Company, User
+from jobs.models import Job, Application
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_kb')
+
+# Cards por página nos benchmarks de renderização dos templates.
+RENDER_CARDS = 1000
+
+
+def percentile(samples, p):
+    """Percentil pelo método do posto mais próximo sobre amostras já ordenadas."""
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+
+@contextmanager
+def throwaway_database(in_place=False):
+    """Banco de teste descartável, como o do test runner, para não tocar nos dados reais."""
+    if in_place:
+        yield
+        return
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+class QueryCounter:
+    """execute_wrapper que só conta os comandos SQL, sem guardá-los como connection.queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def compare(current, baseline, threshold, min_delta_ms=1.0):
+    """
+    Linhas (benchmark, métrica, base, atual) em que o valor atual passa do
+    da base em mais de `threshold` (0.2 = 20%). Tempos que pioraram menos de
+    `min_delta_ms` são ruído e não contam. Benchmarks ausentes em um dos
+    lados são ignorados.
+    """
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in METRICS:
+            if metric not in base or result[metric] <= base[metric] * (1 + threshold):
+                continue
+            if metric.endswith('_ms') and result[metric] - base[metric] < min_delta_ms:
+                continue
+            regressions.append((name, metric, base[metric], result[metric]))
+    return regressions
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the hot views, scoring and populate_db on a seeded throwaway database, '
+            'optionally saving the results as a JSON baseline or comparing them with one.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.1, help='Dataset size, passed to populate_db.')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed calls per benchmark.')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for populate_db.')
+        parser.add_argument('--save', metavar='FILE', help='Write the results to this JSON baseline file.')
+        parser.add_argument('--baseline', metavar='FILE', help='Compare the results with this baseline file.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Relative increase over the baseline reported as a regression (default: 0.2 = 20%%).'
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=1.0,
+            help='Timing increases smaller than this are treated as noise.'
+        )
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database as is instead of creating a test database. Adds rows to it, '
+                 'so repeated runs need different --seed values.'
+        )
+
+    def handle(self, *args, **options):
+        self.iterations = max(1, options['iterations'])
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Baseline inválido: {error}")
+
+        with throwaway_database(options['in_place']):
+            results = self.run(options['scale'], options['seed'])
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'scale': options['scale'],
+                'iterations': self.iterations,
+                'python': platform.python_version(),
+                'database': connection.vendor,
+            },
+            'results': results,
+        }
+        self.print_results(results, baseline and baseline['results'])
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Resultados gravados em {options['save']}.")
+
+        if baseline:
+            if baseline['meta'].get('scale') != options['scale']:
+                self.stdout.write(self.style.WARNING("⚠️ Baseline gerado com outro --scale."))
+            regressions = compare(results, baseline['results'], options['threshold'], options['min_delta_ms'])
+            for name, metric, before, after in regressions:
+                self.stdout.write(self.style.ERROR(f"{name} {metric}: {before} -> {after}"))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressão(ões) acima de {options['threshold']:.0%}.")
+            self.stdout.write(self.style.SUCCESS("✅ Nenhuma regressão."))
+
+    def measure(self, call, iterations=None, before=None):
+        """
+        Cronometra `call` `iterations` vezes (após uma chamada de aquecimento)
+        e mede o pico de memória em uma chamada extra com tracemalloc, que não
+        entra nos tempos. `before` roda antes de cada chamada, fora do relógio.
+        """
+        iterations = iterations or self.iterations
+        timings = []
+        queries = []
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            for i in range(iterations + 1):
+                if before:
+                    before()
+                counter.count = 0
+                started = time.perf_counter()
+                call()
+                elapsed = time.perf_counter() - started
+                if i:
+                    timings.append(elapsed * 1000)
+                    queries.append(counter.count)
+
+        if before:
+            before()
+        tracemalloc.start()
+        try:
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return self.summary(timings, queries, peak)
+
+    def summary(self, timings, queries, peak):
+        timings.sort()
+        return {
+            'samples': len(timings),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'queries': max(queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+    def run(self, scale, seed):
+        results = {}
+
+        # Uma única carga, com tracemalloc ligado o tempo todo: o tempo inclui o
+        # custo do tracemalloc, o que mantém as execuções comparáveis entre si.
+        counter = QueryCounter()
+        tracemalloc.start()
+        try:
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                call_command('populate_db', '--scale', str(scale), '--seed', str(seed), stdout=StringIO())
+                elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        results['populate_db'] = self.summary([elapsed * 1000], [counter.count], peak)
+
+        job = Job.objects.select_related('company__user').order_by('-applications_count', 'pk').first()
+        if job is None:
+            raise CommandError("populate_db não criou vagas; aumente --scale.")
+        company_client = Client()
+        company_client.force_login(job.company.user)
+
+        # A lista pública fica em cache (jobs.board): mede o caminho frio e o servido do cache.
+        results['job_list'] = self.measure(self.get(Client(), reverse('jobs:job_list')), before=cache.clear)
+        results['job_list_cached'] = self.measure(self.get(Client(), reverse('jobs:job_list')))
+        results['job_detail'] = self.measure(self.get(company_client, reverse('jobs:job_detail', args=[job.pk])))
+        results['candidate_list'] = self.measure(
+            self.get(company_client, reverse('jobs:candidate_list', args=[job.pk]))
+        )
+        # Os relatórios ficam em cache; limpá-lo antes de cada chamada mede o caminho frio.
+        for name in ('jobs_per_month', 'apps_per_month', 'candidates_per_month'):
+            results[name] = self.measure(self.get(company_client, reverse(f'jobs:{name}')), before=cache.clear)
+
+        # Uma chamada isolada leva microssegundos; cada amostra são 1000 chamadas.
+        application = Application.objects.select_related('job').first()
+        results['compute_score_x1000'] = self.measure(
+            lambda: [application.compute_score() for _ in range(1000)]
+        )
+
+        results['apply_post'] = self.measure_apply()
+        results.update(self.measure_render())
+        return results
+
+    def get(self, client, url):
+        def call():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"GET {url}: status {response.status_code}")
+        return call
+
+    def measure_apply(self):
+        """Cada POST cria uma candidatura nova: usa o candidato com mais vagas ainda não aplicadas."""
+        candidate = (Candidate.objects.select_related('user')
+                     .annotate(total=Count('applications')).order_by('total', 'pk').first())
+        jobs = list(Job.objects.exclude(applications__candidate=candidate)
+                    .order_by('pk').values_list('pk', flat=True)[:self.iterations + 2])
+        if len(jobs) < 3:
+            raise CommandError("Vagas insuficientes para medir ApplyView.post; aumente --scale.")
+
+        client = Client()
+        client.force_login(candidate.user)
+        data = {
+            'salary_expectation': 1500,
+            'candidate_last_education': candidate.last_education,
+            'candidate_experience': candidate.experience,
+        }
+        pending = iter(jobs)
+
+        def call():
+            url = reverse('jobs:apply', args=[next(pending)])
+            response = client.post(url, data)
+            if response.status_code != 302:
+                raise CommandError(f"POST {url}: status {response.status_code}")
+        return self.measure(call, iterations=len(jobs) - 2)
+
+    def measure_render(self):
+        """
+        Renderização de job_list.html e candidate_list.html com RENDER_CARDS
+        cards cada, com o cache de fragmentos vazio e cheio. Os objetos são
+        montados em memória: só o template é medido, qualquer que seja --scale.
+        """
+        now = timezone.now()
+        company = Company(pk=1, name='Empresa')
+        job = Job(pk=1, company=company, title='Vaga', salary_band=1, min_education=1, created_at=now, updated_at=now)
+        jobs = [
+            Job(pk=i, company=company, title=f'Vaga {i}', salary_band=1 + i % 4, min_education=1 + i % 6,
+                created_at=now, updated_at=now, applications_count=i)
+            for i in range(1, RENDER_CARDS + 1)
+        ]
+        applications = [
+            Application(pk=i, job=job, score=i % 3, candidate=Candidate(
+                pk=i, user=User(email=f'candidato{i}@exemplo.com'), last_education=1 + i % 6
+            ))
+            for i in range(1, RENDER_CARDS + 1)
+        ]
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        pages = {
+            'render_job_list': ('jobs/job_list.html', {'jobs': jobs}),
+            'render_candidate_list': (
+                'jobs/candidate_list.html', {'job': job, 'applications': applications, 'score_counts': {}}
+            ),
+        }
+
+        results = {}
+        for name, (template, context) in pages.items():
+            def render(template=template, context=context):
+                render_to_string(template, context, request)
+            results[f'{name}_{RENDER_CARDS}'] = self.measure(render, before=cache.clear)
+            results[f'{name}_{RENDER_CARDS}_cached'] = self.measure(render)
+        return results
+
+    def print_results(self, results, baseline=None):
+        header = f"{'benchmark':<34}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'peak KB':>11}"
+        self.stdout.write(header + ('  Δp95' if baseline else ''))
+        for name, result in results.items():
+            line = (f"{name:<34}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                    f"{result['queries']:>9}{result['peak_kb']:>11.1f}")
+            base = (baseline or {}).get(name)
+            if base and base.get('p95_ms'):
+                line += f"  {result['p95_ms'] / base['p95_ms'] - 1:+.0%}"
+            self.stdout.write(line)
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+from asgiref.sync import ThreadSensitiveContext
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from jobs.models import Job
+from .bench import percentile, throwaway_database
+
+ENDPOINTS = ('jobs:job_list_data', 'jobs:reports_data', 'jobs:jobs_per_month')
+
+
+class Command(BaseCommand):
+    help = ('Compares the throughput of the JSON endpoints served through the WSGI handler (a fixed pool '
+            'of worker threads) and the ASGI handler, with many concurrent connections, in process, on a '
+            'seeded throwaway database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.1, help='Dataset size, passed to populate_db.')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for populate_db.')
+        parser.add_argument('--connections', type=int, default=500, help='Concurrent client connections.')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint and handler.')
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='WSGI worker threads, like gunicorn --threads (default: 8).'
+        )
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database as is instead of creating a test database. Adds rows to it, '
+                 'so repeated runs need different --seed values.'
+        )
+
+    def handle(self, *args, **options):
+        self.connections = max(1, options['connections'])
+        self.requests = max(1, options['requests'])
+        self.threads = max(1, options['threads'])
+
+        with throwaway_database(options['in_place']):
+            call_command('populate_db', '--scale', str(options['scale']), '--seed', str(options['seed']),
+                         stdout=StringIO())
+            job = Job.objects.select_related('company__user').order_by('-applications_count', 'pk').first()
+            if job is None:
+                raise CommandError("populate_db não criou vagas; aumente --scale.")
+            client = Client()
+            client.force_login(job.company.user)
+            self.cookies = client.cookies
+
+            self.stdout.write(f"{'endpoint':<26}{'handler':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+            for name in ENDPOINTS:
+                url = reverse(name)
+                for handler, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+                    result = asyncio.run(run(url))
+                    self.stdout.write(
+                        f"{name:<26}{handler:<8}{result['rps']:>10.1f}{result['p50_ms']:>10.2f}"
+                        f"{result['p95_ms']:>10.2f}"
+                    )
+
+    async def load(self, call):
+        """
+        `connections` clientes concorrentes, cada um enviando uma requisição
+        depois da outra até completar `requests`. Devolve vazão e latências.
+        """
+        await call()  # aquecimento
+        remaining = iter(range(self.requests))
+        timings = []
+
+        async def connection():
+            for _ in remaining:
+                started = time.perf_counter()
+                await call()
+                timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(min(self.connections, self.requests))))
+        elapsed = time.perf_counter() - started
+        timings.sort()
+        return {
+            'rps': len(timings) / elapsed,
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+        }
+
+    async def run_wsgi(self, url):
+        """Como um servidor WSGI: as conexões esperam na fila por uma das `threads` threads."""
+        local = threading.local()
+
+        def get():
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.cookies.update(self.cookies)
+            self.expect_ok(url, local.client.get(url))
+
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            return await self.load(lambda: loop.run_in_executor(pool, get))
+
+    async def run_asgi(self, url):
+        """Como o ASGIHandler: cada requisição tem seu próprio contexto para o código síncrono (ORM)."""
+        client = AsyncClient()
+        client.cookies.update(self.cookies)
+
+        async def get():
+            async with ThreadSensitiveContext():
+                self.expect_ok(url, await client.get(url))
+
+        return await self.load(get)
+
+    def expect_ok(self, url, response):
+        if response.status_code != 200:
+            raise CommandError(f"GET {url}: status {response.status_code}")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import Company
+from jobs.applications import import_applications, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports applications for a company from a CSV or JSONL file, streaming it in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with header) or JSONL file.')
+        parser.add_argument('--company', type=int, required=True, help='Id of the company that owns the jobs.')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows validated and inserted per batch.')
+
+    def handle(self, *args, **options):
+        try:
+            company = Company.objects.get(pk=options['company'])
+        except Company.DoesNotExist:
+            raise CommandError(f"Empresa {options['company']} não encontrada.")
+
+        format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if format not in ('csv', 'jsonl'):
+            raise CommandError("Informe --format: a extensão deve ser .csv ou .jsonl.")
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            result = import_applications(company, read_rows(stream, format), options['chunk_size'])
+
+        for line, message in result.errors:
+            self.stderr.write(f"Linha {line}: {message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... e mais {result.error_count - len(result.errors)} erro(s).")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result.created} candidatura(s) importada(s), {result.duplicates} já existente(s), "
+            f"{result.error_count} com erro."
+        ))
@@ -1,11 +1,20 @@
+import multiprocessing
 import random
+import time
+from contextlib import contextmanager
 from datetime import timedelta
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from faker import Faker
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from accounts.models import Company, Candidate
+from jobs import board, recommendations, reports
 from jobs.models import Job, Application
+from jobs.scoring import score_many
+from . import _datagen
 
 fake = Faker()
 User = get_user_model()
@@ -33,84 +42,179 @@ salary_bands = {
     Job.SalaryBand.ABOVE_3K: (3001, 8000),
 }
 
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
 class Command(BaseCommand):
     help = 'Populates the database with companies, candidates, jobs and applications.'
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write("Populating database... pode demorar alguns minutos.")
-        companies = self.create_companies()
-        candidates = self.create_candidates()
-        jobs = self.create_jobs(companies)
-        self.create_applications(jobs, candidates)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help=f'Multiplies the default dataset ({NUM_COMPANIES} companies, {NUM_CANDIDATES} candidates, '
+                 f'{NUM_JOBS} jobs, up to {MAX_APPS_PER_JOB} applications per job).'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert / transaction.')
+        parser.add_argument('--seed', type=int, help='Seed for random and Faker, for reproducible datasets.')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes generating fake rows in parallel; inserts stay in this process.'
+        )
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        self.batch_size = options['batch_size']
+        self.seed = options['seed']
+        if self.seed is not None:
+            random.seed(self.seed)
+            Faker.seed(self.seed)
+
+        # Um único hash para todos os usuários: o PBKDF2 padrão é a parte mais cara da carga.
+        self.password_hash = make_password(PASSWORD)
+
+        self.stdout.write("Populating database...")
+        started = time.perf_counter()
+        with self.generator_pool(options['workers']):
+            companies = self.create_companies(max(1, round(NUM_COMPANIES * scale)))
+            candidates = self.create_candidates(max(1, round(NUM_CANDIDATES * scale)))
+            eligible = self.bucket_by_education(candidates)
+
+            num_jobs = total_apps = 0
+            for jobs in self.create_jobs(companies, max(1, round(NUM_JOBS * scale))):
+                num_jobs += len(jobs)
+                total_apps += self.create_applications(jobs, eligible)
+
+        # bulk_create não dispara os signals: contadores e relatórios são recalculados em lote.
+        call_command('reconcile_application_counts', stdout=self.stdout)
+        reports.rebuild()
+        recommendations.rebuild(self.batch_size)
+        board.bump_version()
+
+        elapsed = time.perf_counter() - started
+        total_rows = 2 * (len(companies) + len(candidates)) + num_jobs + total_apps
+        self.stdout.write(f"{total_rows} linhas em {elapsed:.1f}s ({total_rows / elapsed:,.0f} linhas/s).")
 
         company = random.choice(companies)
         self.stdout.write(self.style.SUCCESS(
             f"\n✅ Pronto! Você pode logar com a empresa: -> email: {company.user.email} / password: {PASSWORD}"
         ))
 
-    def create_companies(self):
-        companies = []
-        for _ in range(NUM_COMPANIES):
-            email = fake.unique.company_email()
-            user = User.objects.create_user(
-                email=email,
-                password=PASSWORD,
-                is_company=True
-            )
-            company = Company.objects.create(user=user, name=fake.company())
-            companies.append(company)
-        return companies
-
-    def create_candidates(self):
+    @contextmanager
+    def generator_pool(self, workers):
+        if workers > 1:
+            with multiprocessing.Pool(workers) as pool:
+                self.generate = pool.imap
+                yield
+        else:
+            self.generate = map
+            yield
+
+    def chunk_specs(self, kind, total, *args):
+        """Um bloco por lote, cada um com sua semente derivada de --seed."""
+        for i, start in enumerate(range(0, total, self.batch_size)):
+            seed = None if self.seed is None else f'{self.seed}-{kind}-{i}'
+            yield (seed, start, min(self.batch_size, total - start)) + args
+
+    def bulk_insert(self, model, objs):
+        for batch in chunked(objs, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+        return objs
+
+    def create_companies(self, count):
+        users = [
+            User(email=f'company{i}.{fake.user_name()}@{fake.free_email_domain()}',
+                 password=self.password_hash, is_company=True)
+            for i in range(count)
+        ]
+        self.bulk_insert(User, users)
+        companies = [Company(user=user, name=fake.company()) for user in users]
+        return self.bulk_insert(Company, companies)
+
+    def create_candidates(self, count):
+        education = [int(choice) for choice in education_choices]
         candidates = []
-        for _ in range(NUM_CANDIDATES):
-            email = fake.unique.email()
-            user = User.objects.create_user(
-                email=email,
-                password=PASSWORD,
-                is_candidate=True
-            )
-            candidate = Candidate.objects.create(
-                user=user,
-                last_education=random.choice(education_choices),
-                experience=fake.text(max_nb_chars=200)
-            )
-            candidates.append(candidate)
+        for rows in self.generate(_datagen.candidate_rows, self.chunk_specs('candidates', count, education)):
+            users = [User(email=email, password=self.password_hash, is_candidate=True) for email, _, _ in rows]
+            batch = [
+                Candidate(user=user, last_education=last_education, experience=experience)
+                for user, (_, last_education, experience) in zip(users, rows)
+            ]
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                Candidate.objects.bulk_create(batch)
+            candidates.extend(batch)
         return candidates
 
-    def create_jobs(self, companies):
-        jobs = []
-        for _ in range(NUM_JOBS):
-            company = random.choice(companies)
-            salary_band = random.choice(list(Job.SalaryBand))
-            created_at = timezone.now() - timedelta(days=random.randint(0, 365))
-            job = Job.objects.create(
-                company=company,
-                title=fake.job(),
-                salary_band=salary_band,
-                requirements=fake.text(max_nb_chars=200),
-                min_education=random.choice(education_choices),
-                created_at=created_at
-            )
-            jobs.append(job)
-        return jobs
-
-    def create_applications(self, jobs, candidates):
+    def bucket_by_education(self, candidates):
+        """Candidatos elegíveis para cada escolaridade mínima, montados uma única vez."""
+        by_level = {level: [] for level in education_choices}
+        for candidate in candidates:
+            by_level[candidate.last_education].append(candidate)
+
+        eligible = {}
+        accumulated = []
+        for level in sorted(education_choices, reverse=True):
+            accumulated = by_level[level] + accumulated
+            eligible[level] = accumulated
+        return eligible
+
+    def create_jobs(self, companies, count):
+        """Gera as vagas em lotes, devolvendo cada lote já gravado."""
+        now = timezone.now()
+        bands = [int(band) for band in Job.SalaryBand]
+        education = [int(choice) for choice in education_choices]
+        specs = ((seed, size, len(companies), bands, education)
+                 for seed, _, size in self.chunk_specs('jobs', count))
+
+        for rows in self.generate(_datagen.job_rows, specs):
+            jobs = [
+                Job(
+                    company=companies[company_index],
+                    title=title,
+                    salary_band=salary_band,
+                    requirements=requirements,
+                    min_education=min_education,
+                    created_at=now - timedelta(days=days_ago)
+                )
+                for company_index, title, salary_band, requirements, min_education, days_ago in rows
+            ]
+            with transaction.atomic():
+                Job.objects.bulk_create(jobs)
+            yield jobs
+
+    def create_applications(self, jobs, eligible):
+        total = 0
+        batch = []
         for job in jobs:
             num_apps = random.randint(1, MAX_APPS_PER_JOB)
-            eligible_candidates = [c for c in candidates if c.last_education >= job.min_education]
+            eligible_candidates = eligible[job.min_education]
             if not eligible_candidates:
                 continue
             selected_candidates = random.sample(eligible_candidates, min(num_apps, len(eligible_candidates)))
+            band_min, band_max = salary_bands[job.salary_band]
             for candidate in selected_candidates:
-                band_min, band_max = salary_bands[job.salary_band]
-                salary = round(random.uniform(band_min, band_max), 2)
-                created_at = job.created_at + timedelta(days=random.randint(0, 30))
-                Application.objects.create(
+                batch.append(Application(
                     job=job,
                     candidate=candidate,
-                    salary_expectation=salary,
+                    salary_expectation=round(random.uniform(band_min, band_max), 2),
                     candidate_last_education=candidate.last_education,
                     candidate_experience=candidate.experience,
-                    created_at=created_at
-                )
+                    created_at=job.created_at + timedelta(days=random.randint(0, 30))
+                ))
+            if len(batch) >= self.batch_size:
+                total += self.flush_applications(batch)
+                batch = []
+        if batch:
+            total += self.flush_applications(batch)
+        return total
+
+    def flush_applications(self, batch):
+        for application, score in zip(batch, score_many(batch)):
+            application.score = score
+        with transaction.atomic():
+            Application.objects.bulk_create(batch)
+        return len(batch)
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from jobs import reports
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the MonthlyStats rollup table used by the report endpoints from Job and Application.'
+
+    def handle(self, *args, **options):
+        rows = reports.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"✅ {rows} linha(s) de estatísticas mensais geradas."))
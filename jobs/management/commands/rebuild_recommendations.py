@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from jobs import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the TF-IDF job index used by the "jobs for you" recommendations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert.')
+
+    def handle(self, *args, **options):
+        total = recommendations.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} vaga(s) indexada(s)."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from jobs import board
+from jobs.models import Job, Application
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Job.applications_count from the Application table, fixing any drift in bulk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many jobs have drifted.')
+
+    def handle(self, *args, **options):
+        counts = (Application.objects
+                  .filter(job=OuterRef('pk'))
+                  .order_by()
+                  .values('job')
+                  .annotate(total=Count('pk'))
+                  .values('total'))
+        actual = Coalesce(Subquery(counts), 0)
+
+        drifted = Job.objects.annotate(actual=actual).exclude(applications_count=F('actual'))
+        if options['dry_run']:
+            self.stdout.write(f"{drifted.count()} vaga(s) com contador divergente.")
+            return
+
+        updated = Job.objects.filter(pk__in=drifted.values('pk')).update(applications_count=actual)
+        if updated:
+            board.bump_version()
+        self.stdout.write(self.style.SUCCESS(f"✅ {updated} vaga(s) corrigida(s)."))
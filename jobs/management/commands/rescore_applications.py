@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from jobs.models import Application
+from jobs.scoring import rescore
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Application.score in bulk with set-based SQL updates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--job', type=int, action='append', dest='jobs', metavar='JOB_ID',
+            help='Only rescore applications of this job (repeatable). Defaults to the whole table.'
+        )
+
+    def handle(self, *args, **options):
+        applications = Application.objects.all()
+        if options['jobs']:
+            applications = applications.filter(job__in=options['jobs'])
+
+        updated = rescore(applications)
+        self.stdout.write(self.style.SUCCESS(f"✅ {updated} candidatura(s) repontuada(s)."))
@@ -0,0 +1,94 @@
+# Generated by Django 4.2.23 on 2026-10-18 17:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('salary_band', models.IntegerField(choices=[(1, 'Até R$ 1.000'), (2, 'De 1.000 até R$ 2.000'), (3, 'De 2.000 até R$ 3.000'), (4, 'Acima de R$ 3.000')])),
+                ('requirements', models.TextField()),
+                ('min_education', models.IntegerField(choices=[(1, 'Ensino fundamental'), (2, 'Ensino médio'), (3, 'Tecnólogo'), (4, 'Ensino superior'), (5, 'Pós / MBA / Mestrado'), (6, 'Doutorado')])),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('applications_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='accounts.company')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Application',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('salary_expectation', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('candidate_last_education', models.IntegerField(choices=[(1, 'Ensino fundamental'), (2, 'Ensino médio'), (3, 'Tecnólogo'), (4, 'Ensino superior'), (5, 'Pós / MBA / Mestrado'), (6, 'Doutorado')])),
+                ('candidate_experience', models.TextField(blank=True)),
+                ('score', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('candidate', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='accounts.candidate')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='jobs.job')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('jobs_count', models.IntegerField(default=0)),
+                ('applications_count', models.IntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_stats', to='accounts.company')),
+            ],
+            options={
+                'unique_together': {('company', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='JobTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='jobs.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', '-weight', 'job'], name='jobterm_term_idx')],
+                'unique_together': {('job', 'term')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['-created_at', '-id'], name='job_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['company', '-created_at', '-id'], name='job_company_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', '-score', 'created_at'], include=('candidate',), name='app_job_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['candidate', 'job'], name='app_candidate_job_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['created_at'], name='app_created_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='application',
+            unique_together={('job', 'candidate')},
+        ),
+    ]
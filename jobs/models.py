@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from accounts.models import Company, Candidate
+from . import scoring
 
 class Job(models.Model):
   class SalaryBand(models.IntegerChoices):
@@ -24,17 +25,25 @@ class Job(models.Model):
   requirements = models.TextField()
   min_education = models.IntegerField(choices=MinEducation.choices)
   created_at = models.DateTimeField(default=timezone.now)
+  # Parte da chave do cache de fragmentos dos cards da vaga (job_list.html).
+  updated_at = models.DateTimeField(auto_now=True)
+  # Mantido por jobs.signals; use `manage.py reconcile_application_counts` para corrigir divergências.
+  applications_count = models.PositiveIntegerField(default=0, editable=False)
+
+  class Meta:
+    indexes = [
+      # Paginação por cursor da lista pública e de "Minhas Vagas".
+      models.Index(fields=['-created_at', '-id'], name='job_recent_idx'),
+      models.Index(fields=['company', '-created_at', '-id'], name='job_company_recent_idx'),
+    ]
 
   def __str__(self):
     return f'{self.title} @ {self.company}'
-  
-  @property
-  def applications_count(self):
-    return self.applications_count()
 
 class Application(models.Model):
   job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
-  candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='applications')
+  # Indexado por app_candidate_job_idx, que começa por candidate.
+  candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='applications', db_index=False)
 
   salary_expectation = models.DecimalField(max_digits=10, decimal_places=2)
   candidate_last_education = models.IntegerField(choices=Job.MinEducation.choices)
@@ -45,34 +54,53 @@ class Application(models.Model):
 
   class Meta:
     unique_together = ('job', 'candidate')
+    indexes = [
+      # Candidatos de uma vaga por pontuação; no PostgreSQL o INCLUDE evita ir à tabela.
+      models.Index(fields=['job', '-score', 'created_at'], include=['candidate'], name='app_job_score_idx'),
+      # "Candidato aplicou a alguma vaga da empresa?" (CandidateDetailView).
+      models.Index(fields=['candidate', 'job'], name='app_candidate_job_idx'),
+      models.Index(fields=['created_at'], name='app_created_idx'),
+    ]
 
   def __str__(self):
     return f'{self.candidate} -> {self.job}'
   
   def compute_score(self):
-    score = 0
-
-    if self._salary_fits_band():
-      score += 1
-
-    if self.candidate_last_education >= self.job.min_education:
-      score += 1
-    
-    return score
+    return scoring.score_many([self])[0]
   
   def _salary_fits_band(self):
-    s = float(self.salary_expectation)
-    band = self.job.salary_band
-
-    salary_map = {
-        Job.SalaryBand.UP_TO_1K: lambda val: val <= 1000,
-        Job.SalaryBand.FROM_1K_TO_2K: lambda val: 1000 <= val <= 2000,
-        Job.SalaryBand.FROM_2K_TO_3K: lambda val: 2000 <= val <= 3000,
-        Job.SalaryBand.ABOVE_3K: lambda val: val > 3000,
-    }
-
-    return salary_map.get(band, lambda val: False)(s)
+    return scoring.salary_fits_band(self.job.salary_band, self.salary_expectation)
   
   def save(self, *args, **kwargs):
     self.score = self.compute_score()
     super().save(*args, **kwargs)
+
+class MonthlyStats(models.Model):
+  """Totais mensais por empresa, mantidos por jobs.signals para os relatórios."""
+  company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='monthly_stats')
+  month = models.DateField()
+  jobs_count = models.IntegerField(default=0)
+  applications_count = models.IntegerField(default=0)
+
+  class Meta:
+    unique_together = ('company', 'month')
+
+  def __str__(self):
+    return f'{self.company} {self.month:%Y-%m}'
+
+class JobTerm(models.Model):
+  """Peso TF-IDF de um termo dos requisitos de uma vaga (índice de jobs.recommendations)."""
+  # Indexado por unique_together, que começa por job; jobterm_term_idx cobre
+  # a frequência por termo e as entradas de maior peso de cada termo.
+  job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='terms', db_index=False)
+  term = models.CharField(max_length=64)
+  weight = models.FloatField()
+
+  class Meta:
+    unique_together = ('job', 'term')
+    indexes = [
+      models.Index(fields=['term', '-weight', 'job'], name='jobterm_term_idx'),
+    ]
+
+  def __str__(self):
+    return f'{self.term} ({self.weight:.3f}) -> {self.job_id}'
@@ -0,0 +1,191 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def invalid_cursor():
+  return Http404("Página inválida.")
+
+
+def encode_cursor(direction, key):
+  payload = json.dumps([direction, *key], separators=(',', ':'))
+  return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+  """
+  Devolve (direção, chave) de um cursor gerado por encode_cursor.
+  Qualquer cursor malformado vira 404, como uma página inexistente.
+  """
+  try:
+    padded = token + '=' * (-len(token) % 4)
+    direction, *key = json.loads(base64.urlsafe_b64decode(padded))
+  except (ValueError, TypeError):
+    raise invalid_cursor()
+
+  if direction not in (NEXT, PREVIOUS):
+    raise invalid_cursor()
+  return direction, key
+
+
+class CursorPage:
+  def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+    self.object_list = object_list
+    self.next_cursor = next_cursor
+    self.previous_cursor = previous_cursor
+
+  def __iter__(self):
+    return iter(self.object_list)
+
+  def __len__(self):
+    return len(self.object_list)
+
+  def has_next(self):
+    return self.next_cursor is not None
+
+  def has_previous(self):
+    return self.previous_cursor is not None
+
+  def has_other_pages(self):
+    return self.has_next() or self.has_previous()
+
+
+def paginate(fetch, key, token, page_size):
+  """
+  Monta uma CursorPage a partir de `fetch(after, backwards, limit)`, que
+  devolve até `limit` linhas depois da chave `after` na ordem da listagem
+  (ou antes dela, em ordem inversa, quando `backwards`), e de `key(obj)`,
+  que extrai a chave serializável em JSON de cada linha.
+  """
+  after, backwards = _position(token)
+  return _page(list(fetch(after, backwards, page_size + 1)), key, token, backwards, page_size)
+
+
+async def apaginate(fetch, key, token, page_size):
+  """paginate() para views async: `fetch` deve devolver um queryset, lido com o ORM async."""
+  after, backwards = _position(token)
+  rows = [row async for row in fetch(after, backwards, page_size + 1)]
+  return _page(rows, key, token, backwards, page_size)
+
+
+def _position(token):
+  if not token:
+    return None, False
+  direction, after = decode_cursor(token)
+  return after, direction == PREVIOUS
+
+
+def _page(rows, key, token, backwards, page_size):
+  has_more = len(rows) > page_size
+  rows = rows[:page_size]
+
+  if backwards:
+    rows.reverse()
+    has_next, has_previous = True, has_more
+  else:
+    has_next, has_previous = has_more, bool(token)
+
+  return CursorPage(
+    rows,
+    next_cursor=encode_cursor(NEXT, key(rows[-1])) if has_next and rows else None,
+    previous_cursor=encode_cursor(PREVIOUS, key(rows[0])) if has_previous and rows else None,
+  )
+
+
+def recent_first(queryset):
+  """fetch de paginate() para um queryset em ordem (created_at, id) decrescente."""
+  def fetch(after, backwards, limit):
+    ordered = queryset.order_by('-created_at', '-pk')
+    if after is not None:
+      try:
+        created_at, pk = after
+        created_at = parse_datetime(created_at)
+      except (ValueError, TypeError):
+        raise invalid_cursor()
+      if created_at is None or not isinstance(pk, int):
+        raise invalid_cursor()
+
+      if backwards:
+        ordered = ordered.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)).reverse()
+      else:
+        ordered = ordered.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    return ordered[:limit]
+
+  return fetch
+
+
+def recent_first_key(obj):
+  return [obj.created_at.isoformat(), obj.pk]
+
+
+def top_scored(queryset):
+  """
+  fetch de paginate() para candidaturas em ordem de pontuação decrescente,
+  com empates resolvidos por (created_at, id) crescentes — a ordem do índice
+  app_job_score_idx quando o queryset é filtrado por vaga.
+  """
+  def fetch(after, backwards, limit):
+    ordered = queryset.order_by('-score', 'created_at', 'pk')
+    if after is not None:
+      try:
+        score, created_at, pk = after
+        created_at = parse_datetime(created_at)
+      except (ValueError, TypeError):
+        raise invalid_cursor()
+      if created_at is None or not isinstance(score, int) or not isinstance(pk, int):
+        raise invalid_cursor()
+
+      if backwards:
+        ordered = ordered.filter(
+          Q(score__gt=score)
+          | Q(score=score, created_at__lt=created_at)
+          | Q(score=score, created_at=created_at, pk__lt=pk)
+        ).reverse()
+      else:
+        ordered = ordered.filter(
+          Q(score__lt=score)
+          | Q(score=score, created_at__gt=created_at)
+          | Q(score=score, created_at=created_at, pk__gt=pk)
+        )
+    return ordered[:limit]
+
+  return fetch
+
+
+def top_scored_key(obj):
+  return [obj.score, obj.created_at.isoformat(), obj.pk]
+
+
+class CursorPaginationMixin:
+  """
+  Paginação por cursor (keyset) sobre (created_at, id), do mais recente
+  para o mais antigo. Cada página é um único SELECT com LIMIT, então o
+  custo não cresce com o número da página.
+  """
+  paginate_by = 20
+  cursor_kwarg = 'cursor'
+
+  def get_cursor_fetch(self, queryset):
+    return recent_first(queryset)
+
+  def get_cursor_key(self, obj):
+    return recent_first_key(obj)
+
+  def paginate_queryset(self, queryset, page_size):
+    page = paginate(self.get_cursor_fetch(queryset), self.get_cursor_key,
+                    self.request.GET.get(self.cursor_kwarg), page_size)
+    return None, page, page.object_list, page.has_other_pages()
+
+  def get_context_data(self, **kwargs):
+    context = super().get_context_data(**kwargs)
+    # Filtros da URL atual, repetidos nos links de próxima/anterior.
+    query = self.request.GET.copy()
+    query.pop(self.cursor_kwarg, None)
+    context['cursor_query'] = query.urlencode()
+    return context
@@ -0,0 +1,176 @@
+"""
+"Vagas para você": recomendações de vagas para candidatos.
+
+Os requisitos de cada vaga ficam pré-processados em JobTerm como um vetor
+TF-IDF esparso e normalizado (um índice invertido termo -> vagas). O índice
+é atualizado a cada save() de Job; bulk_create e a deriva natural do IDF
+são corrigidos com `manage.py rebuild_recommendations`.
+
+Uma recomendação lê apenas as entradas do índice para os termos mais
+relevantes da experiência do candidato, no máximo MAX_POSTINGS por termo
+(as de maior peso), e ordena as vagas pelos mesmos critérios da
+pontuação das candidaturas (escolaridade e faixa salarial, via tabelas
+compiladas de jobs.scoring) e, em seguida, pela similaridade textual.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from . import board
+from .models import Job, JobTerm
+from .scoring import compile_rules, get_rules, salary_bucket, tokens
+
+MAX_TERM_LENGTH = 64
+# Limites de uma recomendação: termos da experiência consultados (os de maior
+# peso) e entradas do índice lidas por termo, para um termo comum não ler o índice todo.
+MAX_QUERY_TERMS = 16
+MAX_POSTINGS = 500
+
+
+def term_frequencies(text):
+  counts = Counter(token[:MAX_TERM_LENGTH] for token in tokens(text))
+  return {term: 1 + math.log(count) for term, count in counts.items()}
+
+
+def _idf(document_frequency, total):
+  # O total vem do cache e pode estar um pouco defasado; nunca é menor que a frequência.
+  total = max(total, document_frequency)
+  return math.log((1 + total) / (1 + document_frequency)) + 1
+
+
+def _normalized(weights):
+  norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+  return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+
+def _document_frequencies(terms):
+  return dict(JobTerm.objects
+              .filter(term__in=list(terms))
+              .order_by()
+              .values_list('term')
+              .annotate(total=Count('job')))
+
+
+def _job_count():
+  """
+  Total de vagas para o IDF, em cache sob a versão de jobs.board, que muda a
+  cada vaga criada ou removida: o save() de uma vaga não precisa de um COUNT.
+  """
+  key = f'recommendations:job_count:{board.version()}'
+  total = cache.get(key)
+  if total is None:
+    total = Job.objects.count()
+    cache.set(key, total, board.CACHE_TIMEOUT)
+  return total
+
+
+def index_job(job):
+  """(Re)indexa os requisitos de uma vaga."""
+  tf = term_frequencies(job.requirements)
+  with transaction.atomic():
+    JobTerm.objects.filter(job=job).delete()
+    if not tf:
+      return
+    df = _document_frequencies(tf)
+    total = _job_count()
+    weights = _normalized({term: weight * _idf(df.get(term, 0) + 1, total) for term, weight in tf.items()})
+    JobTerm.objects.bulk_create(JobTerm(job=job, term=term, weight=weight) for term, weight in weights.items())
+
+
+def rebuild(batch_size=5000):
+  """Recalcula todo o índice com o IDF atual. Retorna o número de vagas indexadas."""
+  documents = {}
+  df = Counter()
+  for pk, requirements in Job.objects.values_list('pk', 'requirements').iterator(chunk_size=batch_size):
+    tf = term_frequencies(requirements)
+    documents[pk] = tf
+    df.update(tf.keys())
+
+  total = len(documents)
+  with transaction.atomic():
+    JobTerm.objects.all().delete()
+    batch = []
+    for pk, tf in documents.items():
+      weights = _normalized({term: weight * _idf(df[term], total) for term, weight in tf.items()})
+      batch.extend(JobTerm(job_id=pk, term=term, weight=weight) for term, weight in weights.items())
+      if len(batch) >= batch_size:
+        JobTerm.objects.bulk_create(batch)
+        batch = []
+    JobTerm.objects.bulk_create(batch)
+  return total
+
+
+def recommend(candidate, limit=20):
+  """
+  Até `limit` vagas ainda não aplicadas pelo candidato, da melhor para a
+  pior. Cada vaga recebe `match_points` (critérios da pontuação) e
+  `similarity` (cosseno TF-IDF entre experiência e requisitos).
+  """
+  history = list(candidate.applications.order_by('-created_at').values_list('job_id', 'salary_expectation'))
+  applied = {job_id for job_id, _ in history}
+  # Candidate não guarda pretensão salarial: usamos a da candidatura mais recente, se houver.
+  salary = history[0][1] if history else None
+
+  compiled = compile_rules(get_rules())
+  bucket = salary_bucket(salary) if salary is not None else None
+
+  def match_points(salary_band, min_education):
+    points = compiled.education_points.get((min_education, candidate.last_education), 0)
+    if bucket is not None:
+      points += compiled.salary_points.get((salary_band, bucket), 0)
+    return points
+
+  query = _query_vector(candidate.experience)
+  similarity = defaultdict(float)
+  profile = {}
+  for term, query_weight in query.items():
+    # Uma consulta por termo, pelo índice (term, -weight): lê no máximo MAX_POSTINGS entradas.
+    postings = (JobTerm.objects
+                .filter(term=term)
+                .exclude(job__in=applied)
+                .order_by('-weight')
+                .values_list('job_id', 'weight', 'job__salary_band', 'job__min_education')[:MAX_POSTINGS])
+    for job_id, weight, salary_band, min_education in postings:
+      similarity[job_id] += weight * query_weight
+      profile[job_id] = (salary_band, min_education)
+
+  if not similarity:
+    # Sem texto em comum: vagas recentes para as quais a escolaridade basta.
+    jobs = list(Job.objects
+                .filter(min_education__lte=candidate.last_education)
+                .exclude(pk__in=applied)
+                .order_by('-created_at', '-pk')[:limit])
+    for job in jobs:
+      job.match_points = match_points(job.salary_band, job.min_education)
+      job.similarity = 0.0
+    return jobs
+
+  ranked = heapq.nlargest(
+    limit,
+    similarity,
+    key=lambda job_id: (match_points(*profile[job_id]), similarity[job_id], job_id),
+  )
+  jobs = Job.objects.in_bulk(ranked)
+  results = []
+  for job_id in ranked:
+    if job_id in jobs:
+      job = jobs[job_id]
+      job.match_points = match_points(job.salary_band, job.min_education)
+      job.similarity = similarity[job_id]
+      results.append(job)
+  return results
+
+
+def _query_vector(text):
+  tf = term_frequencies(text)
+  if not tf:
+    return {}
+  df = _document_frequencies(tf)
+  total = _job_count()
+  # Termos que não aparecem em nenhuma vaga não contribuem para o cosseno.
+  query = _normalized({term: weight * _idf(df[term], total) for term, weight in tf.items() if term in df})
+  return dict(heapq.nlargest(MAX_QUERY_TERMS, query.items(), key=lambda item: (item[1], item[0])))
@@ -0,0 +1,179 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Job, Application, MonthlyStats
+
+
+def month_start(value):
+  """Mesmo agrupamento de TruncMonth: mês no fuso horário corrente."""
+  return timezone.localtime(value).date().replace(day=1)
+
+
+def record(company_id, created_at, field, delta):
+  """Soma `delta` ao contador `field` do mês de `created_at` da empresa."""
+  month = month_start(created_at)
+  if delta > 0:
+    MonthlyStats.objects.get_or_create(company_id=company_id, month=month)
+  # Em remoções a linha não é recriada: ela some junto com a empresa em deleções em cascata.
+  MonthlyStats.objects.filter(company_id=company_id, month=month).update(**{field: F(field) + delta})
+  transaction.on_commit(lambda: bump_version(company_id))
+
+
+# Cada empresa tem um número de versão no cache que muda a cada escrita em
+# suas estatísticas; dados em cache e ETags são chaveados por ele, então
+# nunca precisam ser apagados explicitamente. Com vários processos, use um
+# backend de cache compartilhado (Redis, Memcached, banco).
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(company_id):
+  return f'reports:version:{company_id}'
+
+
+def data_version(company_id):
+  version = cache.get(_version_key(company_id))
+  if version is None:
+    # Começar do relógio garante uma versão nova se a chave tiver sido despejada do cache.
+    version = int(time.time() * 1000)
+    if not cache.add(_version_key(company_id), version, None):
+      version = cache.get(_version_key(company_id), version)
+  return version
+
+
+async def adata_version(company_id):
+  """data_version() para views async."""
+  version = await cache.aget(_version_key(company_id))
+  if version is None:
+    version = int(time.time() * 1000)
+    if not await cache.aadd(_version_key(company_id), version, None):
+      version = await cache.aget(_version_key(company_id), version)
+  return version
+
+
+def bump_version(company_id):
+  try:
+    cache.incr(_version_key(company_id))
+  except ValueError:
+    data_version(company_id)
+
+
+def _digest(value):
+  return hashlib.md5(repr(value).encode()).hexdigest()
+
+
+def etag(company_id, key):
+  """ETag forte para `key` (ex.: a URL pedida) na versão atual dos dados da empresa."""
+  return _digest((company_id, data_version(company_id), key))
+
+
+async def aetag(company_id, key):
+  return _digest((company_id, await adata_version(company_id), key))
+
+
+# Séries disponíveis nos relatórios: nome -> (campo de MonthlyStats, rótulo).
+SERIES = {
+  'jobs': ('jobs_count', 'Vagas por mês'),
+  'applications': ('applications_count', 'Aplicações por mês'),
+  'candidates': ('applications_count', 'Candidatos por mês'),
+}
+
+
+def _monthly_rows(company_id, fields, start, end):
+  queryset = MonthlyStats.objects.filter(company_id=company_id)
+  if start:
+    queryset = queryset.filter(month__gte=start)
+  if end:
+    queryset = queryset.filter(month__lte=end)
+
+  return (queryset
+          .values('month')
+          .annotate(**{field: Sum(field) for field in fields})
+          .order_by('month'))
+
+
+def monthly_totals(company_id, fields, start=None, end=None):
+  """
+  Um único SELECT sobre as MonthlyStats da empresa com a soma de cada campo
+  por mês. Devolve [(mês, {campo: total})].
+  """
+  rows = _monthly_rows(company_id, fields, start, end)
+  return [(row['month'], {field: row[field] for field in fields}) for row in rows]
+
+
+async def amonthly_totals(company_id, fields, start=None, end=None):
+  rows = _monthly_rows(company_id, fields, start, end)
+  return [(row['month'], {field: row[field] for field in fields}) async for row in rows]
+
+
+def chart_data(totals, field, label):
+  """Formato consumido pelo Chart.js em reports.html, ignorando meses zerados."""
+  points = [(month, values[field]) for month, values in totals if values[field]]
+  return {
+    'labels': [month.strftime('%Y-%m') for month, _ in points],
+    'datasets': [{'label': label, 'data': [total for _, total in points]}],
+  }
+
+
+def _series_key(company_id, version, names, start, end):
+  return f'reports:data:{company_id}:{version}:{_digest((sorted(names), start, end))}'
+
+
+def _series(totals, names):
+  return {name: chart_data(totals, *SERIES[name]) for name in names}
+
+
+def build_series(company_id, names, start=None, end=None):
+  """
+  Calcula as séries pedidas de uma vez, consultando cada campo uma única
+  vez, e guarda o resultado no cache até a próxima escrita da empresa.
+  """
+  key = _series_key(company_id, data_version(company_id), names, start, end)
+  series = cache.get(key)
+  if series is None:
+    fields = sorted({SERIES[name][0] for name in names})
+    series = _series(monthly_totals(company_id, fields, start, end), names)
+    cache.set(key, series, CACHE_TIMEOUT)
+  return series
+
+
+async def abuild_series(company_id, names, start=None, end=None):
+  """build_series() com o cache e o ORM async, para as views async de relatório."""
+  key = _series_key(company_id, await adata_version(company_id), names, start, end)
+  series = await cache.aget(key)
+  if series is None:
+    fields = sorted({SERIES[name][0] for name in names})
+    series = _series(await amonthly_totals(company_id, fields, start, end), names)
+    await cache.aset(key, series, CACHE_TIMEOUT)
+  return series
+
+
+def _counts_by_company_month(queryset, company_field):
+  return (queryset
+          .annotate(month=TruncMonth('created_at', output_field=DateField()))
+          .values_list(company_field, 'month')
+          .annotate(total=Count('pk'))
+          .order_by())
+
+
+def rebuild():
+  """Recalcula toda a tabela MonthlyStats a partir de Job e Application."""
+  rows = {}
+  for company_id, month, total in _counts_by_company_month(Job.objects.all(), 'company_id'):
+    rows.setdefault((company_id, month), MonthlyStats(company_id=company_id, month=month)).jobs_count = total
+  for company_id, month, total in _counts_by_company_month(Application.objects.all(), 'job__company_id'):
+    rows.setdefault((company_id, month), MonthlyStats(company_id=company_id, month=month)).applications_count = total
+
+  with transaction.atomic():
+    company_ids = set(MonthlyStats.objects.values_list('company_id', flat=True).distinct())
+    company_ids.update(company_id for company_id, _ in rows)
+    MonthlyStats.objects.all().delete()
+    MonthlyStats.objects.bulk_create(rows.values(), batch_size=1000)
+    for company_id in company_ids:
+      transaction.on_commit(lambda company_id=company_id: bump_version(company_id))
+  return len(rows)
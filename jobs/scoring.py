@@ -0,0 +1,278 @@
+"""
+Pipeline de pontuação das candidaturas.
+
+As regras (ScoringRules) são compiladas uma única vez por processo em
+tabelas de consulta: pontos por (faixa salarial, faixa de pretensão) e por
+(escolaridade mínima, escolaridade do candidato), além da matriz combinada
+faixa × pretensão × escolaridade mínima × escolaridade usada por score_many.
+A pontuação de cada linha vira uma soma de consultas em tabela, e as mesmas
+tabelas geram o CASE dos UPDATEs em lote.
+"""
+import bisect
+import operator
+import re
+from collections import namedtuple
+from functools import lru_cache, reduce
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, Count, ExpressionWrapper, Q, Value, When
+
+# Limites de cada Job.SalaryBand (1 a 4) como lookups sobre salary_expectation.
+SALARY_BAND_LOOKUPS = {
+  1: {'lte': 1000},
+  2: {'gte': 1000, 'lte': 2000},
+  3: {'gte': 2000, 'lte': 3000},
+  4: {'gt': 3000},
+}
+
+# Valores de Job.MinEducation / Candidate.Education.
+EDUCATION_LEVELS = range(1, 7)
+
+_OPERATORS = {
+  'lt': operator.lt,
+  'lte': operator.le,
+  'gt': operator.gt,
+  'gte': operator.ge,
+}
+
+_WORD_RE = re.compile(r'\w{3,}')
+
+# Pesos de cada critério. As tolerâncias dizem quantos degraus (faixas
+# salariais ou níveis de escolaridade) ainda rendem pontos parciais; com
+# tolerância 0 o critério é binário. Os valores padrão reproduzem o sistema
+# original: +1 pela faixa salarial, +1 pela escolaridade.
+ScoringRules = namedtuple(
+  'ScoringRules',
+  ['salary_weight', 'salary_tolerance', 'education_weight', 'education_tolerance', 'keyword_weight'],
+  defaults=(1, 0, 1, 0, 0),
+)
+
+
+def get_rules():
+  """Regras configuradas em settings.JOBS_SCORING_RULES (dict com os campos de ScoringRules)."""
+  return ScoringRules(**getattr(settings, 'JOBS_SCORING_RULES', {}))
+
+
+def salary_fits_band(salary_band, salary):
+  lookups = SALARY_BAND_LOOKUPS.get(salary_band)
+  if not lookups:
+    return False
+  return all(_OPERATORS[op](salary, limit) for op, limit in lookups.items())
+
+
+SALARY_BOUNDARIES = sorted({limit for lookups in SALARY_BAND_LOOKUPS.values() for limit in lookups.values()})
+SALARY_BUCKETS = range(2 * len(SALARY_BOUNDARIES) + 1)
+
+
+def salary_bucket(salary):
+  """
+  Posição da pretensão em relação aos limites das faixas: índices pares são
+  os intervalos abertos entre limites, ímpares são os próprios limites.
+  """
+  i = bisect.bisect_left(SALARY_BOUNDARIES, salary)
+  if i < len(SALARY_BOUNDARIES) and salary == SALARY_BOUNDARIES[i]:
+    return 2 * i + 1
+  return 2 * i
+
+
+def _bucket_sample(bucket):
+  i, on_boundary = divmod(bucket, 2)
+  if on_boundary:
+    return SALARY_BOUNDARIES[i]
+  if i == 0:
+    return SALARY_BOUNDARIES[0] - 1
+  if i == len(SALARY_BOUNDARIES):
+    return SALARY_BOUNDARIES[-1] + 1
+  return (SALARY_BOUNDARIES[i - 1] + SALARY_BOUNDARIES[i]) / 2
+
+
+def _bucket_condition(bucket):
+  i, on_boundary = divmod(bucket, 2)
+  if on_boundary:
+    return Q(salary_expectation=SALARY_BOUNDARIES[i])
+  condition = Q()
+  if i > 0:
+    condition &= Q(salary_expectation__gt=SALARY_BOUNDARIES[i - 1])
+  if i < len(SALARY_BOUNDARIES):
+    condition &= Q(salary_expectation__lt=SALARY_BOUNDARIES[i])
+  return condition
+
+
+def _points(weight, tolerance, distance):
+  if distance == 0:
+    return weight
+  if distance <= tolerance:
+    return weight * (tolerance + 1 - distance) // (tolerance + 1)
+  return 0
+
+
+class CompiledRules:
+  def __init__(self, rules):
+    self.rules = rules
+    self.salary_points = {}
+    for band in SALARY_BAND_LOOKUPS:
+      fitting = [b for b in SALARY_BUCKETS if salary_fits_band(band, _bucket_sample(b))]
+      for bucket in SALARY_BUCKETS:
+        # Cada faixa ocupa dois buckets (intervalo + limite), então a distância em faixas é a metade.
+        distance = -(-min(abs(bucket - b) for b in fitting) // 2)
+        self.salary_points[band, bucket] = _points(rules.salary_weight, rules.salary_tolerance, distance)
+
+    self.education_points = {
+      (min_education, level): _points(rules.education_weight, rules.education_tolerance, max(0, min_education - level))
+      for min_education in EDUCATION_LEVELS
+      for level in EDUCATION_LEVELS
+    }
+
+    self.table = {
+      (band, min_education, bucket, level): self.salary_points[band, bucket] + self.education_points[min_education, level]
+      for band in SALARY_BAND_LOOKUPS
+      for min_education in EDUCATION_LEVELS
+      for bucket in SALARY_BUCKETS
+      for level in EDUCATION_LEVELS
+    }
+
+  @property
+  def job_fields(self):
+    """Campos de Job dos quais a pontuação depende com estas regras."""
+    fields = {'salary_band', 'min_education'}
+    if self.rules.keyword_weight:
+      fields.add('requirements')
+    return fields
+
+  @property
+  def sql_expressible(self):
+    return not self.rules.keyword_weight
+
+  @property
+  def max_score(self):
+    return max(self.table.values()) + self.rules.keyword_weight
+
+
+@lru_cache(maxsize=None)
+def compile_rules(rules):
+  return CompiledRules(rules)
+
+
+def tokens(text):
+  """Palavras com 3+ caracteres, em minúsculas, na ordem do texto."""
+  return _WORD_RE.findall(text.lower())
+
+
+def keywords(text):
+  return frozenset(tokens(text))
+
+
+def score_many(applications, rules=None):
+  """
+  Pontua um lote de candidaturas e devolve a lista de pontuações na mesma
+  ordem. Não altera as instâncias nem acessa o banco além de `application.job`,
+  que deve vir carregado (select_related) para lotes grandes.
+  """
+  compiled = compile_rules(rules or get_rules())
+  table = compiled.table
+  keyword_weight = compiled.rules.keyword_weight
+  requirements_cache = {}
+
+  scores = []
+  for application in applications:
+    job = application.job
+    score = table.get((job.salary_band, job.min_education, salary_bucket(application.salary_expectation),
+                       application.candidate_last_education), 0)
+
+    if keyword_weight:
+      required = requirements_cache.get(job.pk)
+      if required is None:
+        required = requirements_cache[job.pk] = keywords(job.requirements)
+      if required:
+        overlap = len(required & keywords(application.candidate_experience))
+        score += round(keyword_weight * overlap / len(required))
+
+    scores.append(score)
+  return scores
+
+
+def score_counts(applications, rules=None):
+  """
+  Quantas candidaturas do queryset tiraram cada pontuação, de 0 até a
+  máxima possível com as regras atuais, em uma única consulta agregada.
+  """
+  counts = dict(applications.order_by().values_list('score').annotate(total=Count('pk')))
+  top = max([compile_rules(rules or get_rules()).max_score, *counts])
+  return {score: counts.get(score, 0) for score in range(top + 1)}
+
+
+def score_expression(salary_band, min_education, rules=None):
+  """
+  Equivalente SQL de score_many para as candidaturas de vagas com a faixa
+  salarial e escolaridade mínima informadas. Só existe para regras sem o
+  critério de palavras-chave.
+  """
+  compiled = compile_rules(rules or get_rules())
+
+  def case(conditions_by_points):
+    whens = [When(reduce(operator.or_, conditions), then=Value(points))
+             for points, conditions in conditions_by_points.items() if points]
+    return Case(*whens, default=Value(0)) if whens else Value(0)
+
+  salary_conditions = {}
+  for bucket in SALARY_BUCKETS:
+    points = compiled.salary_points.get((salary_band, bucket), 0)
+    salary_conditions.setdefault(points, []).append(_bucket_condition(bucket))
+
+  education_conditions = {}
+  for level in EDUCATION_LEVELS:
+    points = compiled.education_points.get((min_education, level), 0)
+    education_conditions.setdefault(points, []).append(Q(candidate_last_education=level))
+
+  return ExpressionWrapper(case(salary_conditions) + case(education_conditions),
+                           output_field=models.PositiveSmallIntegerField())
+
+
+def rescore(applications, batch_size=2000):
+  """
+  Recalcula Application.score para o queryset inteiro e retorna o número de
+  candidaturas atualizadas. Com regras expressáveis em SQL são UPDATEs com
+  CASE, um por combinação (faixa salarial, escolaridade mínima) presente —
+  no máximo 24 comandos, sem carregar linhas em Python. Caso contrário, as
+  linhas são lidas em blocos, pontuadas com score_many e gravadas com
+  bulk_update.
+  """
+  rules = get_rules()
+  updated = 0
+
+  with transaction.atomic():
+    if compile_rules(rules).sql_expressible:
+      combos = (applications
+                .order_by()
+                .values_list('job__salary_band', 'job__min_education')
+                .distinct())
+      for salary_band, min_education in list(combos):
+        updated += (applications
+                    .filter(job__salary_band=salary_band, job__min_education=min_education)
+                    .update(score=score_expression(salary_band, min_education, rules)))
+      return updated
+
+    rows = (applications
+            .select_related('job')
+            .only('score', 'salary_expectation', 'candidate_last_education', 'candidate_experience',
+                  'job__salary_band', 'job__min_education', 'job__requirements')
+            .order_by('pk')
+            .iterator(chunk_size=batch_size))
+    batch = []
+    for application in rows:
+      batch.append(application)
+      if len(batch) == batch_size:
+        updated += _rescore_batch(batch, rules)
+        batch = []
+    if batch:
+      updated += _rescore_batch(batch, rules)
+
+  return updated
+
+
+def _rescore_batch(batch, rules):
+  model = type(batch[0])
+  for application, score in zip(batch, score_many(batch, rules)):
+    application.score = score
+  return model.objects.bulk_update(batch, ['score'])
@@ -0,0 +1,180 @@
+"""
+Busca textual de vagas (título + requisitos).
+
+O índice é mantido pelo próprio banco, então acompanha qualquer escrita em
+jobs_job — save(), delete() e bulk_create():
+
+- SQLite: tabela FTS5 de conteúdo externo atualizada por triggers;
+- PostgreSQL: coluna tsvector gerada com índice GIN.
+
+Ambos são criados por ensure_index(), ligado ao post_migrate do app, que
+também recria os triggers apagados quando uma migração reconstrói a tabela
+jobs_job no SQLite. Em outros bancos a busca cai para icontains.
+"""
+import re
+
+from django.db import connection, connections
+from django.db.models import Q
+
+from .models import Job
+from .pagination import invalid_cursor
+
+FTS_TABLE = 'jobs_job_fts'
+
+SQLITE_TABLE = f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+  title, requirements, content='jobs_job', content_rowid='id',
+  tokenize='unicode61 remove_diacritics 2'
+)"""
+
+SQLITE_TRIGGERS = {
+  f'{FTS_TABLE}_ai': f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON jobs_job BEGIN
+    INSERT INTO {FTS_TABLE}(rowid, title, requirements) VALUES (new.id, new.title, new.requirements);
+  END""",
+  f'{FTS_TABLE}_ad': f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON jobs_job BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, requirements) VALUES ('delete', old.id, old.title, old.requirements);
+  END""",
+  f'{FTS_TABLE}_au': f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, requirements ON jobs_job BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, requirements) VALUES ('delete', old.id, old.title, old.requirements);
+    INSERT INTO {FTS_TABLE}(rowid, title, requirements) VALUES (new.id, new.title, new.requirements);
+  END""",
+}
+
+# Reindexa as vagas a partir de jobs_job (as que já existiam antes da tabela ou dos triggers).
+SQLITE_REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+POSTGRES_SCHEMA = [
+  """ALTER TABLE jobs_job ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('portuguese', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('portuguese', coalesce(requirements, '')), 'B')
+  ) STORED""",
+  "CREATE INDEX IF NOT EXISTS jobs_job_search_idx ON jobs_job USING GIN (search_vector)",
+]
+
+# Relevância: o título pesa 10x os requisitos. Maior é melhor nos dois bancos.
+SQLITE_HITS = f"""
+  SELECT jobs_job.id AS id, -bm25({FTS_TABLE}, 10.0, 1.0) AS score
+  FROM {FTS_TABLE} JOIN jobs_job ON jobs_job.id = {FTS_TABLE}.rowid
+  WHERE {FTS_TABLE} MATCH %s{{filters}}
+"""
+
+POSTGRES_HITS = """
+  SELECT jobs_job.id AS id, ts_rank(jobs_job.search_vector, query) AS score
+  FROM jobs_job, websearch_to_tsquery('portuguese', %s) query
+  WHERE jobs_job.search_vector @@ query{filters}
+"""
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def ensure_index(using='default'):
+  """
+  Cria o que faltar do índice. No SQLite, migrações que recriam a tabela
+  jobs_job (ex.: ao adicionar uma coluna NOT NULL) apagam os triggers junto:
+  eles são recriados a cada migrate e, se algum faltava, o índice é
+  reconstruído para incluir as escritas feitas sem eles.
+  """
+  conn = connections[using]
+  with conn.cursor() as cursor:
+    if conn.vendor == 'sqlite':
+      names = [FTS_TABLE, *SQLITE_TRIGGERS]
+      cursor.execute(f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})", names)
+      if len(cursor.fetchall()) == len(names):
+        return
+      cursor.execute(SQLITE_TABLE)
+      for statement in SQLITE_TRIGGERS.values():
+        cursor.execute(statement)
+      cursor.execute(SQLITE_REBUILD)
+    elif conn.vendor == 'postgresql':
+      for statement in POSTGRES_SCHEMA:
+        cursor.execute(statement)
+
+
+def _fts_query(text):
+  # Cada palavra vira um termo entre aspas com prefixo: nenhuma sintaxe do FTS5 vem do usuário.
+  return ' '.join(f'"{token}"*' for token in _TOKEN_RE.findall(text))
+
+
+def search_fetch(text, salary_band=None, min_education=None):
+  """
+  fetch de pagination.paginate() para a busca: vagas que casam com `text`,
+  por relevância decrescente e id decrescente. Cada vaga devolvida recebe
+  o atributo `search_score`, usado como chave do cursor.
+  """
+  filters, filter_params = '', []
+  if salary_band:
+    filters += ' AND jobs_job.salary_band = %s'
+    filter_params.append(salary_band)
+  if min_education:
+    filters += ' AND jobs_job.min_education = %s'
+    filter_params.append(min_education)
+
+  if connection.vendor == 'sqlite':
+    hits, term = SQLITE_HITS.format(filters=filters), _fts_query(text)
+  elif connection.vendor == 'postgresql':
+    hits, term = POSTGRES_HITS.format(filters=filters), text
+  else:
+    return _fallback_fetch(text, salary_band, min_education)
+
+  def fetch(after, backwards, limit):
+    if not term:
+      return []
+    sql = f"WITH hits AS MATERIALIZED ({hits}) SELECT id, score FROM hits"
+    params = [term, *filter_params]
+    if after is not None:
+      score, pk = _parse_key(after)
+      op = '>' if backwards else '<'
+      sql += f" WHERE score {op} %s OR (score = %s AND id {op} %s)"
+      params += [score, score, pk]
+    order = 'ASC' if backwards else 'DESC'
+    sql += f" ORDER BY score {order}, id {order} LIMIT %s"
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+      cursor.execute(sql, params)
+      ranked = cursor.fetchall()
+
+    jobs = Job.objects.in_bulk([pk for pk, _ in ranked])
+    results = []
+    for pk, score in ranked:
+      if pk in jobs:
+        jobs[pk].search_score = score
+        results.append(jobs[pk])
+    return results
+
+  return fetch
+
+
+def search_key(job):
+  return [job.search_score, job.pk]
+
+
+def _parse_key(after):
+  try:
+    score, pk = after
+  except (ValueError, TypeError):
+    raise invalid_cursor()
+  if not isinstance(score, (int, float)) or not isinstance(pk, int):
+    raise invalid_cursor()
+  return score, pk
+
+
+def _fallback_fetch(text, salary_band, min_education):
+  queryset = Job.objects.all()
+  for token in _TOKEN_RE.findall(text):
+    queryset = queryset.filter(Q(title__icontains=token) | Q(requirements__icontains=token))
+  if salary_band:
+    queryset = queryset.filter(salary_band=salary_band)
+  if min_education:
+    queryset = queryset.filter(min_education=min_education)
+
+  def fetch(after, backwards, limit):
+    ordered = queryset.order_by('-pk')
+    if after is not None:
+      _, pk = _parse_key(after)
+      ordered = ordered.filter(pk__gt=pk).reverse() if backwards else ordered.filter(pk__lt=pk)
+    results = list(ordered[:limit])
+    for job in results:
+      job.search_score = 0
+    return results
+
+  return fetch
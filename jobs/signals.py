@@ -0,0 +1,131 @@
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import Candidate
+from jobconvo_enock import metrics
+from . import board, recommendations, reports, search
+from .models import Job, Application
+
+APPLICATIONS_CREATED = metrics.Counter(
+  'jobs_applications_created_total', 'Candidaturas criadas, por pontuação.', ['score']
+)
+
+
+@receiver(post_save, sender=Application)
+def increment_applications_count(sender, instance, created, **kwargs):
+  if created:
+    Job.objects.filter(pk=instance.job_id).update(applications_count=F('applications_count') + 1)
+
+
+def _cascade(origin):
+  """
+  Se a remoção começou em outro modelo (vaga, candidato, empresa, usuário)
+  e as candidaturas saem em cascata. Nesse caso os receivers de Job e
+  Candidate fazem o trabalho em lote, e os de Application não fazem nada.
+  """
+  model = origin.model if isinstance(origin, QuerySet) else type(origin)
+  return model is not Application
+
+
+@receiver(post_delete, sender=Application)
+def decrement_applications_count(sender, instance, origin=None, **kwargs):
+  if _cascade(origin):
+    return
+  Job.objects.filter(pk=instance.job_id, applications_count__gt=0).update(applications_count=F('applications_count') - 1)
+
+
+@receiver(pre_delete, sender=Candidate)
+def decrement_applications_count_of_candidate(sender, instance, **kwargs):
+  # Um único UPDATE para todas as vagas do candidato. Vagas removidas não precisam de ajuste.
+  (Job.objects
+   .filter(pk__in=instance.applications.values('job_id'), applications_count__gt=0)
+   .update(applications_count=F('applications_count') - 1))
+
+
+@receiver(post_save, sender=Job)
+def record_job_created(sender, instance, created, **kwargs):
+  if created:
+    reports.record(instance.company_id, instance.created_at, 'jobs_count', 1)
+
+
+@receiver(post_save, sender=Job)
+def index_job_terms(sender, instance, update_fields=None, **kwargs):
+  if update_fields is None or 'requirements' in update_fields:
+    recommendations.index_job(instance)
+
+
+@receiver(post_delete, sender=Job)
+def record_job_deleted(sender, instance, **kwargs):
+  reports.record(instance.company_id, instance.created_at, 'jobs_count', -1)
+
+
+@receiver(post_save, sender=Application)
+def record_application_created(sender, instance, created, **kwargs):
+  if created:
+    if Application.job.is_cached(instance):
+      company_id = instance.job.company_id
+    else:
+      company_id = Job.objects.filter(pk=instance.job_id).values_list('company_id', flat=True).first()
+    reports.record(company_id, instance.created_at, 'applications_count', 1)
+
+
+@receiver(post_save, sender=Application)
+def count_application_created(sender, instance, created, **kwargs):
+  if created:
+    APPLICATIONS_CREATED.inc(score=instance.score)
+
+
+@receiver(post_delete, sender=Application)
+def record_application_deleted(sender, instance, origin=None, **kwargs):
+  if _cascade(origin):
+    return
+  company_id = Job.objects.filter(pk=instance.job_id).values_list('company_id', flat=True).first()
+  if company_id is not None:
+    reports.record(company_id, instance.created_at, 'applications_count', -1)
+
+
+@receiver(pre_delete, sender=Job)
+@receiver(pre_delete, sender=Candidate)
+def record_applications_deleted_in_bulk(sender, instance, **kwargs):
+  """
+  Desconta das estatísticas as candidaturas que saem em cascata com a vaga
+  ou o candidato, com um record() por (empresa, mês), como em _import_chunk.
+  Uma mesma chamada de delete() não remove uma vaga e um candidato sem
+  remover também a empresa (e suas estatísticas), então nada é descontado
+  duas vezes.
+  """
+  per_month = {}
+  for company_id, created_at in instance.applications.values_list('job__company_id', 'created_at'):
+    # Uma data de exemplo por mês basta: record() agrupa pelo mês dela.
+    key = (company_id, reports.month_start(created_at))
+    sample, total = per_month.get(key, (created_at, 0))
+    per_month[key] = (sample, total + 1)
+  for (company_id, _), (created_at, total) in per_month.items():
+    reports.record(company_id, created_at, 'applications_count', -total)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Candidate)
+def invalidate_job_board(sender, **kwargs):
+  board.bump_version()
+
+
+@receiver(post_delete, sender=Application)
+def invalidate_job_board_on_withdraw(sender, origin=None, **kwargs):
+  # Em cascata, a vaga ou o candidato removido invalida a lista uma vez só.
+  if not _cascade(origin):
+    board.bump_version()
+
+
+@receiver(post_save, sender=Application)
+def invalidate_job_board_on_apply(sender, instance, created, **kwargs):
+  # Só a criação muda o contador de candidatos exibido na lista.
+  if created:
+    board.bump_version()
+
+
+def create_search_index(sender, using, **kwargs):
+  """Ligado ao post_migrate do app em JobsConfig.ready()."""
+  search.ensure_index(using)
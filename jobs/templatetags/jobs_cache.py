@@ -0,0 +1,25 @@
+import hashlib
+
+from django import template
+
+register = template.Library()
+
+
+def _resolve(obj, path):
+  for name in path.split('.'):
+    obj = getattr(obj, name)
+  return obj
+
+
+@register.filter
+def card_versions(objects, fields):
+  """
+  Resumo de `fields` (atributos separados por vírgula, com pontos para
+  relacionados) de cada objeto da lista, para usar como chave de
+  {% cache %}: a grade inteira de cards vira um só fragmento, que muda
+  quando qualquer card muda. Um {% cache %} por card custaria uma ida ao
+  cache por card, mais cara que renderizá-lo.
+  """
+  paths = [field.strip() for field in fields.split(',')]
+  versions = [tuple(_resolve(obj, path) for path in paths) for obj in objects]
+  return hashlib.md5(repr(versions).encode()).hexdigest()
@@ -1,6 +1,22 @@
-from django.test import TestCase
+import json
+import os
+import re
+import tempfile
+from datetime import date
+from io import StringIO
+from unittest import mock, skipUnless
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q, Sum
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from accounts.models import User, Company, Candidate
-from jobs.models import Job, Application
+from jobs import scoring, search
+from jobs.applications import import_applications
+from jobs.management.commands import bench, bench_concurrency
+from jobs.models import Job, Application, JobTerm, MonthlyStats
+from jobs.pagination import top_scored
 
 class ApplicationModelTest(TestCase):
     def setUp(self):
@@ -104,3 +120,462 @@ class ApplicationModelTest(TestCase):
         self.assertFalse(app_above3k_fail._salary_fits_band())
         app_above3k_ok = Application(job=job_band_above3k, salary_expectation=3000.01)
         self.assertTrue(app_above3k_ok._salary_fits_band())
+
+
+class JobApplicationsCountTest(TestCase):
+    def setUp(self):
+        company_user = User.objects.create_user(email='empresa@teste.com', password='password123')
+        self.company = Company.objects.create(user=company_user, name='Empresa Teste')
+        self.job = Job.objects.create(
+            company=self.company,
+            title='Vaga de Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.SUPERIOR,
+            requirements='Requisitos de teste.'
+        )
+
+    def _apply(self, email):
+        user = User.objects.create_user(email=email, password='password123')
+        candidate = Candidate.objects.create(user=user, last_education=Candidate.Education.SUPERIOR)
+        return Application.objects.create(
+            job=self.job,
+            candidate=candidate,
+            salary_expectation=1500.00,
+            candidate_last_education=Candidate.Education.SUPERIOR
+        )
+
+    def test_counter_follows_creates_and_deletes(self):
+        first = self._apply('a@teste.com')
+        second = self._apply('b@teste.com')
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.applications_count, 2)
+
+        first.save()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.applications_count, 2)
+
+        first.delete()
+        second.candidate.user.delete()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.applications_count, 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        self._apply('a@teste.com')
+        Job.objects.filter(pk=self.job.pk).update(applications_count=42)
+
+        call_command('reconcile_application_counts', stdout=StringIO())
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.applications_count, 1)
+
+
+class RescoreTest(TestCase):
+    def setUp(self):
+        company_user = User.objects.create_user(email='empresa@teste.com', password='password123')
+        company = Company.objects.create(user=company_user, name='Empresa Teste')
+        self.jobs = [
+            Job.objects.create(
+                company=company,
+                title=f'Vaga {band}',
+                salary_band=band,
+                min_education=Job.MinEducation.SUPERIOR,
+                requirements='Requisitos de teste.'
+            )
+            for band in Job.SalaryBand.values
+        ]
+        self.applications = []
+        for i, salary in enumerate([500, 1000, 1500, 2000, 2500, 3000, 3000.01, 8000]):
+            user = User.objects.create_user(email=f'candidato_{i}@teste.com', password='password123')
+            candidate = Candidate.objects.create(user=user, last_education=Candidate.Education.SUPERIOR)
+            for job in self.jobs:
+                self.applications.append(Application.objects.create(
+                    job=job,
+                    candidate=candidate,
+                    salary_expectation=salary,
+                    candidate_last_education=Candidate.Education.MEDIO if i % 2 else Candidate.Education.DOUTORADO
+                ))
+
+    def test_bulk_rescore_matches_compute_score(self):
+        Application.objects.update(score=0)
+        Job.objects.update(min_education=Job.MinEducation.MEDIO)
+
+        call_command('rescore_applications', stdout=StringIO())
+
+        for application in Application.objects.select_related('job'):
+            self.assertEqual(application.score, application.compute_score())
+        self.assertTrue(Application.objects.filter(score=2).exists())
+
+    def test_rescore_limited_to_job(self):
+        Application.objects.update(score=0)
+
+        call_command('rescore_applications', '--job', str(self.jobs[0].pk), stdout=StringIO())
+
+        self.assertFalse(Application.objects.exclude(job=self.jobs[0]).exclude(score=0).exists())
+        self.assertTrue(Application.objects.filter(job=self.jobs[0], score__gt=0).exists())
+
+
+class ScoringPipelineTest(TestCase):
+    def setUp(self):
+        company_user = User.objects.create_user(email='empresa@teste.com', password='password123')
+        company = Company.objects.create(user=company_user, name='Empresa Teste')
+        self.job = Job.objects.create(
+            company=company,
+            title='Vaga Python',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.SUPERIOR,
+            requirements='Python Django PostgreSQL'
+        )
+
+    def _application(self, salary, last_education, experience=''):
+        return Application(
+            job=self.job,
+            salary_expectation=salary,
+            candidate_last_education=last_education,
+            candidate_experience=experience
+        )
+
+    def test_default_rules_keep_binary_score(self):
+        applications = [
+            self._application(1500, Job.MinEducation.SUPERIOR),
+            self._application(2500, Job.MinEducation.SUPERIOR),
+            self._application(1000, Job.MinEducation.TECNOLOGO),
+            self._application(3500, Job.MinEducation.MEDIO),
+        ]
+        self.assertEqual(scoring.score_many(applications), [2, 1, 1, 0])
+
+    def test_weighted_rules_with_tolerance(self):
+        rules = scoring.ScoringRules(salary_weight=4, salary_tolerance=1, education_weight=3, education_tolerance=2)
+        applications = [
+            self._application(1500, Job.MinEducation.SUPERIOR),
+            self._application(2500, Job.MinEducation.TECNOLOGO),
+            self._application(3500, Job.MinEducation.MEDIO),
+            self._application(500, Job.MinEducation.FUNDAMENTAL),
+        ]
+        self.assertEqual(scoring.score_many(applications, rules), [7, 2 + 2, 0 + 1, 2 + 0])
+
+    def test_keyword_overlap(self):
+        rules = scoring.ScoringRules(keyword_weight=3)
+        application = self._application(1500, Job.MinEducation.SUPERIOR, 'Anos de python e django.')
+        self.assertEqual(scoring.score_many([application], rules), [2 + 2])
+
+    def test_bulk_rescore_matches_score_many(self):
+        for i, (salary, education) in enumerate([(500, 1), (1000, 3), (2000, 4), (2500, 5), (3000, 6), (9000, 2)]):
+            user = User.objects.create_user(email=f'candidato_{i}@teste.com', password='password123')
+            candidate = Candidate.objects.create(user=user, last_education=education)
+            Application.objects.create(
+                job=self.job,
+                candidate=candidate,
+                salary_expectation=salary,
+                candidate_last_education=education,
+                candidate_experience='python' if i % 2 else ''
+            )
+
+        for rules in ({'salary_weight': 4, 'salary_tolerance': 2, 'education_tolerance': 3},
+                      {'education_weight': 2, 'keyword_weight': 6}):
+            with self.settings(JOBS_SCORING_RULES=rules):
+                Application.objects.update(score=0)
+                scoring.rescore(Application.objects.all())
+
+                applications = list(Application.objects.select_related('job'))
+                self.assertEqual([a.score for a in applications], scoring.score_many(applications))
+                self.assertTrue(any(a.score for a in applications))
+
+
+class MonthlyStatsTest(TestCase):
+    def setUp(self):
+        company_user = User.objects.create_user(email='empresa@teste.com', password='password123')
+        self.company = Company.objects.create(user=company_user, name='Empresa Teste')
+
+    def _job(self, created_at):
+        return Job.objects.create(
+            company=self.company,
+            title='Vaga',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos',
+            created_at=created_at
+        )
+
+    def _apply(self, job, email, created_at):
+        user = User.objects.create_user(email=email, password='password123')
+        candidate = Candidate.objects.create(user=user, last_education=Candidate.Education.MEDIO)
+        return Application.objects.create(
+            job=job,
+            candidate=candidate,
+            salary_expectation=1500,
+            candidate_last_education=Candidate.Education.MEDIO,
+            created_at=created_at
+        )
+
+    def _stats(self):
+        return sorted(MonthlyStats.objects.values_list('month', 'jobs_count', 'applications_count'))
+
+    def test_stats_follow_creates_and_deletes(self):
+        jan = timezone.datetime(2025, 1, 15, tzinfo=timezone.utc)
+        feb = timezone.datetime(2025, 2, 15, tzinfo=timezone.utc)
+        job = self._job(jan)
+        self._job(feb)
+        self._apply(job, 'a@teste.com', jan)
+        application = self._apply(job, 'b@teste.com', feb)
+
+        self.assertEqual(self._stats(), [(date(2025, 1, 1), 1, 1), (date(2025, 2, 1), 1, 1)])
+
+        application.delete()
+        self.assertEqual(self._stats(), [(date(2025, 1, 1), 1, 1), (date(2025, 2, 1), 1, 0)])
+
+        job.delete()
+        self.assertEqual(self._stats(), [(date(2025, 1, 1), 0, 0), (date(2025, 2, 1), 1, 0)])
+
+    def test_cascade_delete_queries_do_not_grow_with_applications(self):
+        """Remover uma vaga ou um candidato custa o mesmo número de consultas com 2 ou 20 candidaturas."""
+        jan = timezone.datetime(2025, 1, 15, tzinfo=timezone.utc)
+        small, large = self._job(jan), self._job(jan)
+        for i in range(2):
+            self._apply(small, f'p{i}@teste.com', jan)
+        for i in range(20):
+            self._apply(large, f'g{i}@teste.com', jan)
+        self.assertEqual(self._stats(), [(date(2025, 1, 1), 2, 22)])
+
+        with CaptureQueriesContext(connection) as small_queries:
+            small.delete()
+        with CaptureQueriesContext(connection) as large_queries, \
+                mock.patch('jobs.board.bump_version') as bump_version:
+            large.delete()
+        self.assertEqual(len(small_queries), len(large_queries))
+        bump_version.assert_called_once_with()
+        self.assertEqual(self._stats(), [(date(2025, 1, 1), 0, 0)])
+
+        job = self._job(jan)
+        application = self._apply(job, 'c@teste.com', jan)
+        with CaptureQueriesContext(connection) as candidate_queries, \
+                mock.patch('jobs.board.bump_version') as bump_version:
+            application.candidate.delete()
+        # Uma invalidação da lista pública pelo candidato, nenhuma por candidatura.
+        bump_version.assert_called_once_with()
+        self.assertLess(len(candidate_queries), 15)
+        job.refresh_from_db()
+        self.assertEqual(job.applications_count, 0)
+        self.assertEqual(self._stats(), [(date(2025, 1, 1), 1, 0)])
+
+    def test_rebuild_command(self):
+        jan = timezone.datetime(2025, 1, 15, tzinfo=timezone.utc)
+        job = self._job(jan)
+        self._apply(job, 'a@teste.com', jan)
+        MonthlyStats.objects.update(jobs_count=10, applications_count=10)
+
+        call_command('rebuild_monthly_stats', stdout=StringIO())
+
+        self.assertEqual(self._stats(), [(date(2025, 1, 1), 1, 1)])
+        self.company.user.delete()
+        self.assertFalse(MonthlyStats.objects.exists())
+
+
+class PopulateDbTest(TestCase):
+    def test_populate_db_bulk_load(self):
+        call_command('populate_db', '--scale', '0.02', '--batch-size', '7', '--seed', '1', stdout=StringIO())
+        self._assert_consistent()
+
+    def test_populate_db_parallel_workers(self):
+        call_command('populate_db', '--scale', '0.02', '--batch-size', '7', '--workers', '2', stdout=StringIO())
+        self._assert_consistent()
+
+    def _assert_consistent(self):
+
+        self.assertEqual(Company.objects.count(), 1)
+        self.assertEqual(Candidate.objects.count(), 10)
+        self.assertEqual(Job.objects.count(), 20)
+        self.assertTrue(Application.objects.exists())
+
+        for job in Job.objects.all():
+            self.assertEqual(job.applications_count, job.applications.count())
+        for application in Application.objects.select_related('job'):
+            self.assertEqual(application.score, application.compute_score())
+        self.assertEqual(
+            sum(MonthlyStats.objects.values_list('applications_count', flat=True)),
+            Application.objects.count()
+        )
+
+
+class ImportApplicationsCommandTest(TestCase):
+    def test_import_jsonl_in_chunks(self):
+        company_user = User.objects.create_user(email='empresa@teste.com', password='password123')
+        company = Company.objects.create(user=company_user, name='Empresa Teste')
+        job = Job.objects.create(
+            company=company,
+            title='Vaga',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos',
+            created_at=timezone.datetime(2025, 1, 5, tzinfo=timezone.utc)
+        )
+        for i in range(5):
+            user = User.objects.create_user(email=f'c{i}@teste.com', password='password123')
+            Candidate.objects.create(user=user, last_education=Candidate.Education.MEDIO)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'candidaturas.jsonl')
+            with open(path, 'w') as f:
+                for i in range(5):
+                    f.write(json.dumps({'job_id': job.pk, 'email': f'c{i}@teste.com', 'salary_expectation': '1500',
+                                        'created_at': '2025-01-20T12:00:00'}) + '\n')
+                f.write('{quebrado\n')
+                f.write(json.dumps({'job_id': job.pk, 'email': 'c0@teste.com', 'salary_expectation': 1500}) + '\n')
+            stderr = StringIO()
+            call_command('import_applications', path, '--company', str(company.pk), '--chunk-size', '2',
+                         stdout=StringIO(), stderr=stderr)
+
+        self.assertIn('Linha 6: JSON inválido', stderr.getvalue())
+        self.assertEqual(job.applications.count(), 5)
+        self.assertEqual(set(job.applications.values_list('score', flat=True)), {2})
+        job.refresh_from_db()
+        self.assertEqual(job.applications_count, 5)
+        self.assertEqual(MonthlyStats.objects.get(company=company).applications_count, 5)
+
+
+    def test_import_counts_only_inserted_rows(self):
+        """Uma candidatura criada em paralelo durante a importação conta como repetida, não como importada."""
+        company_user = User.objects.create_user(email='empresa@teste.com', password='password123')
+        company = Company.objects.create(user=company_user, name='Empresa Teste')
+        job = Job.objects.create(
+            company=company,
+            title='Vaga',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos'
+        )
+        candidates = []
+        for i in range(3):
+            user = User.objects.create_user(email=f'c{i}@teste.com', password='password123')
+            candidates.append(Candidate.objects.create(user=user, last_education=Candidate.Education.MEDIO))
+
+        def score_many_with_race(applications):
+            # Criada depois da consulta de candidaturas existentes e antes da gravação do lote.
+            Application.objects.create(job=job, candidate=candidates[0], salary_expectation=1500,
+                                       candidate_last_education=Candidate.Education.MEDIO)
+            return scoring.score_many(applications)
+
+        rows = [(i + 1, {'job_id': job.pk, 'email': f'c{i}@teste.com', 'salary_expectation': 1500}) for i in range(3)]
+        with mock.patch('jobs.applications.score_many', score_many_with_race):
+            result = import_applications(company, rows)
+
+        self.assertEqual((result.created, result.duplicates, result.error_count), (2, 1, 0))
+        self.assertEqual(job.applications.count(), 3)
+        job.refresh_from_db()
+        self.assertEqual(job.applications_count, 3)
+        self.assertEqual(MonthlyStats.objects.get(company=company).applications_count, 3)
+
+
+class BenchCommandTest(TestCase):
+    def test_bench_saves_and_compares_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.json')
+            args = ('bench', '--in-place', '--scale', '0.02', '--iterations', '2')
+            call_command(*args, '--save', path, stdout=StringIO())
+            with open(path) as f:
+                results = json.load(f)['results']
+            self.assertIn('apply_post', results)
+            self.assertTrue(set(bench.METRICS) <= set(results['job_list']))
+
+            slower = {name: {metric: value * 10 + 10 for metric, value in result.items()}
+                      for name, result in results.items()}
+            with open(path, 'w') as f:
+                json.dump({'meta': {'scale': 0.02}, 'results': slower}, f)
+            call_command(*args, '--seed', '2', '--baseline', path, stdout=StringIO())
+
+        faster = {'job_list': dict(results['job_list'], queries=0)}
+        self.assertEqual(bench.compare(results, faster, 0.2)[0][:2], ('job_list', 'queries'))
+        noise = {'job_list': dict(results['job_list'], p50_ms=results['job_list']['p50_ms'] / 2)}
+        self.assertEqual(bench.compare(results, noise, 0.2, min_delta_ms=10 ** 6), [])
+
+
+class BenchConcurrencyCommandTest(TransactionTestCase):
+    # As threads do lado WSGI abrem outras conexões: os dados precisam estar gravados de fato.
+    def test_bench_concurrency_runs_both_handlers(self):
+        out = StringIO()
+        call_command('bench_concurrency', '--in-place', '--scale', '0.02', '--connections', '5',
+                     '--requests', '10', '--threads', '2', stdout=out)
+        rows = [line.split()[:2] for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual(rows, [[name, handler] for name in bench_concurrency.ENDPOINTS for handler in ('wsgi', 'asgi')])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Índice FTS5 e triggers do SQLite.')
+class SearchIndexTest(TransactionTestCase):
+    """Migrações que reconstroem jobs_job apagam os triggers do índice; o post_migrate os recria."""
+
+    def test_index_survives_table_rebuild(self):
+        company_user = User.objects.create_user(email='empresa@teste.com', password='password123')
+        company = Company.objects.create(user=company_user, name='Empresa Teste')
+
+        def create(title):
+            return Job.objects.create(
+                company=company,
+                title=title,
+                salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+                min_education=Job.MinEducation.MEDIO,
+                requirements='Requisitos'
+            )
+
+        def found(text):
+            return [job.pk for job in search.search_fetch(text)(None, False, 10)]
+
+        before = create('Desenvolvedor Python')
+        # Como o SQLite aplica um AddField NOT NULL: cria uma tabela nova, copia os dados e troca os nomes.
+        with connection.schema_editor() as editor:
+            editor._remake_table(Job)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'jobs_job'")
+            self.assertEqual(cursor.fetchone()[0], 0)
+        during = create('Analista Python')
+
+        call_command('migrate', verbosity=0)
+        after = create('Engenheiro Python')
+        self.assertEqual(set(found('python')), {before.pk, during.pk, after.pk})
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Planos de consulta verificados com EXPLAIN QUERY PLAN do SQLite.')
+class QueryPlanTest(TestCase):
+    """Cada consulta quente deve usar um índice: sem SCAN da tabela nem ordenação em B-tree temporária."""
+
+    def setUp(self):
+        company_user = User.objects.create_user(email='empresa@teste.com', password='password123')
+        self.company = Company.objects.create(user=company_user, name='Empresa Teste')
+        self.job = Job.objects.create(
+            company=self.company,
+            title='Vaga',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos'
+        )
+        user = User.objects.create_user(email='candidato@teste.com', password='password123')
+        self.candidate = Candidate.objects.create(user=user)
+        Application.objects.create(
+            job=self.job,
+            candidate=self.candidate,
+            salary_expectation=1500,
+            candidate_last_education=Candidate.Education.MEDIO
+        )
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            full_scan = re.search(r'\bSCAN\b', line) and 'USING' not in line
+            self.assertFalse(full_scan or 'TEMP B-TREE' in line, f'Plano sem índice:\n{plan}')
+
+    def test_hot_queries_use_indexes(self):
+        now = timezone.now()
+        after_cursor = Q(created_at__lt=now) | Q(created_at=now, pk__lt=self.job.pk)
+        hot_queries = {
+            'job_list': Job.objects.order_by('-created_at', '-pk')[:21],
+            'job_list_cursor': Job.objects.filter(after_cursor).order_by('-created_at', '-pk')[:21],
+            'my_jobs': Job.objects.filter(after_cursor, company=self.company).order_by('-created_at', '-pk')[:21],
+            'candidate_list': self.job.applications.order_by('-score', 'created_at'),
+            'top_candidates': top_scored(self.job.applications.all())([1, now.isoformat(), 1], False, 11),
+            'candidate_detail': Application.objects.filter(candidate=self.candidate, job__company=self.company),
+            'reports': MonthlyStats.objects.filter(company=self.company).values('month')
+                                           .annotate(total=Sum('jobs_count')).order_by('month'),
+            'recommend_postings': JobTerm.objects.filter(term='requisitos').exclude(job__in=[0])
+                                                 .order_by('-weight').values_list('job_id', 'weight')[:500],
+        }
+        for name, queryset in hot_queries.items():
+            with self.subTest(name):
+                self.assertUsesIndex(queryset)
@@ -0,0 +1,123 @@
+from importlib import import_module
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import Candidate, Company, User
+from jobs import recommendations, reports
+from jobs.models import Application, Job
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Visita todas as URLs de `urlconfs` como visitante, empresa e candidato
+    com o banco em cada tamanho de SIZES (número de candidaturas) e falha se
+    o número de consultas de alguma delas mudar com o volume — o sintoma de
+    um N+1. Para cobrir outro app, herde e ajuste `urlconfs`/`url_kwargs`.
+    """
+    SIZES = (10, 1000, 10000)
+    urlconfs = ('jobs.urls', 'accounts.urls')
+    roles = ('anonymous', 'company', 'candidate')
+
+    def setUp(self):
+        cache.clear()
+        self.company_user = User.objects.create_user(email='empresa@teste.com', password='StrongPass!123')
+        self.company = Company.objects.create(user=self.company_user, name='Empresa Teste')
+        self.candidate_user = User.objects.create_user(email='candidato@teste.com', password='StrongPass!123')
+        self.candidate = Candidate.objects.create(user=self.candidate_user, experience='Python e Django.')
+        self.job = Job.objects.create(
+            company=self.company,
+            title='Vaga Python',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Python, Django e SQL.'
+        )
+        self.password = make_password('StrongPass!123')
+
+    def url_kwargs(self, name):
+        """Argumentos de cada URL; URLs novas com argumentos diferentes precisam ser incluídas aqui."""
+        if name == 'jobs:candidate_detail':
+            return {'pk': self.candidate.pk}
+        return {'pk': self.job.pk, 'job_pk': self.job.pk}
+
+    def url_names(self):
+        for urlconf in self.urlconfs:
+            module = import_module(urlconf)
+            for pattern in module.urlpatterns:
+                yield f'{module.app_name}:{pattern.name}', set(pattern.pattern.regex.groupindex)
+
+    def grow(self, size):
+        """
+        Completa o banco até `size` candidaturas: uma vaga da empresa para cada
+        10 candidaturas, todas com uma candidatura do candidato logado, e o
+        restante como candidatos novos na vaga principal.
+        """
+        jobs = Job.objects.bulk_create(
+            Job(
+                company=self.company,
+                title=f'Vaga {i}',
+                salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+                min_education=Job.MinEducation.MEDIO,
+                requirements=f'Python e tecnologia {i}.'
+            )
+            for i in range(Job.objects.count(), max(1, size // 10))
+        )
+        applications = [
+            Application(job=job, candidate=self.candidate, salary_expectation=1500,
+                        candidate_last_education=Candidate.Education.MEDIO)
+            for job in jobs
+        ]
+        if not Application.objects.filter(job=self.job, candidate=self.candidate).exists():
+            applications.append(Application(job=self.job, candidate=self.candidate, salary_expectation=1500,
+                                            candidate_last_education=Candidate.Education.MEDIO))
+
+        start = User.objects.count()
+        missing = size - Application.objects.count() - len(applications)
+        users = User.objects.bulk_create(
+            User(email=f'c{i}@teste.com', password=self.password) for i in range(start, start + missing)
+        )
+        candidates = Candidate.objects.bulk_create(Candidate(user=user) for user in users)
+        applications.extend(
+            Application(job=self.job, candidate=candidate, salary_expectation=1500,
+                        candidate_last_education=Candidate.Education.MEDIO, score=i % 3)
+            for i, candidate in enumerate(candidates)
+        )
+        Application.objects.bulk_create(applications, batch_size=1000)
+
+        # bulk_create não dispara os signals.
+        reports.rebuild()
+        recommendations.rebuild()
+        self.assertEqual(Application.objects.count(), size)
+
+    def count_queries(self, name, role):
+        self.client.logout()
+        if role != 'anonymous':
+            self.client.force_login(getattr(self, f'{role}_user'))
+        cache.clear()
+        url = reverse(name, kwargs={kwarg: value for kwarg, value in self.url_kwargs(name).items()
+                                    if kwarg in self.kwargs_by_name[name]})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                # O conteúdo de StreamingHttpResponse (e suas consultas) só é gerado na leitura.
+                b''.join(response.streaming_content)
+        return len(queries)
+
+    def test_query_count_independent_of_data_size(self):
+        self.kwargs_by_name = dict(self.url_names())
+        counts = {}
+        for size in self.SIZES:
+            self.grow(size)
+            for name in self.kwargs_by_name:
+                for role in self.roles:
+                    counts.setdefault((name, role), []).append(self.count_queries(name, role))
+
+        for (name, role), by_size in counts.items():
+            with self.subTest(url=name, role=role):
+                self.assertEqual(
+                    len(set(by_size)), 1,
+                    f'{name} como {role}: consultas por tamanho {dict(zip(self.SIZES, by_size))}'
+                )
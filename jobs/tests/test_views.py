@@ -1,12 +1,26 @@
-from django.test import TestCase
+import importlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from datetime import datetime
 from accounts.models import Candidate, User, Company
+from jobconvo_enock import metrics
 from jobs.models import Application, Job
+from jobs.views import JobListView
 
 class JobViewTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.company_user = User.objects.create_user(email='empresa@teste.com', password='StrongPass!123')
         self.company = Company.objects.create(user=self.company_user, name='Empresa Teste')
         self.candidate_user = User.objects.create_user(email='candidato@teste.com', password='StrongPass!123')
@@ -369,4 +383,728 @@ class JobViewTest(TestCase):
 
         self.client.login(email='candidato@teste.com', password='StrongPass!123')
         response = self.client.get(reverse('jobs:reports'))
-        self.assertEqual(response.status_code, 404)
\ No newline at end of file
+        self.assertEqual(response.status_code, 404)
+
+    def test_job_update_rescores_applications(self):
+        """Alterar faixa salarial ou escolaridade mínima recalcula as pontuações."""
+        job = Job.objects.create(
+            company=self.company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.SUPERIOR,
+            requirements='Requisitos teste'
+        )
+        application = Application.objects.create(
+            job=job,
+            candidate=self.candidate,
+            salary_expectation=2500,
+            candidate_last_education=Candidate.Education.MEDIO
+        )
+        self.assertEqual(application.score, 0)
+
+        self.client.login(email='empresa@teste.com', password='StrongPass!123')
+        self.client.post(reverse('jobs:job_update', args=[job.pk]), data={
+            'title': job.title,
+            'salary_band': Job.SalaryBand.FROM_2K_TO_3K,
+            'requirements': job.requirements,
+            'min_education': Job.MinEducation.MEDIO
+        })
+
+        application.refresh_from_db()
+        self.assertEqual(application.score, 2)
+
+    def test_job_update_requirements_rescores_with_keyword_weight(self):
+        """Com peso por palavras-chave, alterar só os requisitos também recalcula as pontuações."""
+        job = Job.objects.create(
+            company=self.company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_2K_TO_3K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Cobol'
+        )
+        with self.settings(JOBS_SCORING_RULES={'keyword_weight': 4}):
+            application = Application.objects.create(
+                job=job,
+                candidate=self.candidate,
+                salary_expectation=2500,
+                candidate_last_education=Candidate.Education.MEDIO,
+                candidate_experience='Python e Django'
+            )
+            self.assertEqual(application.score, 2)
+
+            self.client.login(email='empresa@teste.com', password='StrongPass!123')
+            self.client.post(reverse('jobs:job_update', args=[job.pk]), data={
+                'title': job.title,
+                'salary_band': job.salary_band,
+                'requirements': 'Python e Django',
+                'min_education': job.min_education
+            })
+
+        application.refresh_from_db()
+        self.assertEqual(application.score, 6)
+
+    def test_job_list_cursor_pagination(self):
+        """Percorre a lista de vagas com os cursores de próxima e anterior."""
+        created_at = timezone.datetime(2025, 1, 1, tzinfo=timezone.utc)
+        jobs = [
+            Job.objects.create(
+                company=self.company,
+                title=f'Vaga {i}',
+                salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+                min_education=Job.MinEducation.MEDIO,
+                requirements='Requisitos',
+                created_at=created_at if i % 2 else created_at + timezone.timedelta(days=i)
+            )
+            for i in range(25)
+        ]
+        expected = sorted(jobs, key=lambda job: (job.created_at, job.pk), reverse=True)
+
+        response = self.client.get(reverse('jobs:job_list'))
+        first_page = list(response.context['jobs'])
+        self.assertEqual(first_page, expected[:20])
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+        response = self.client.get(reverse('jobs:job_list'), {'cursor': response.context['page_obj'].next_cursor})
+        self.assertEqual(list(response.context['jobs']), expected[20:])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+        response = self.client.get(reverse('jobs:job_list'), {'cursor': response.context['page_obj'].previous_cursor})
+        self.assertEqual(list(response.context['jobs']), first_page)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_job_list_invalid_cursor(self):
+        """Cursor malformado retorna 404."""
+        response = self.client.get(reverse('jobs:job_list'), {'cursor': 'nao-e-um-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_reports_data_batches_series(self):
+        """O endpoint único retorna todas as séries com uma consulta e aceita filtros."""
+        for month in (1, 2, 3):
+            Job.objects.create(
+                company=self.company,
+                title=f'Vaga {month}',
+                salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+                min_education=Job.MinEducation.MEDIO,
+                requirements='Requisitos',
+                created_at=timezone.datetime(2025, month, 10, tzinfo=timezone.utc)
+            )
+        Application.objects.create(
+            job=Job.objects.get(title='Vaga 2'),
+            candidate=self.candidate,
+            salary_expectation=1500,
+            candidate_last_education=Candidate.Education.MEDIO,
+            created_at=timezone.datetime(2025, 2, 20, tzinfo=timezone.utc)
+        )
+
+        self.client.login(email='empresa@teste.com', password='StrongPass!123')
+        response = self.client.get(reverse('jobs:reports_data'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data), {'jobs', 'applications', 'candidates'})
+        self.assertEqual(data['jobs']['labels'], ['2025-01', '2025-02', '2025-03'])
+        self.assertEqual(data['applications']['labels'], ['2025-02'])
+        self.assertEqual(data['candidates']['datasets'][0]['data'], [1])
+
+        response = self.client.get(reverse('jobs:reports_data'), {'series': 'jobs', 'start': '2025-02', 'end': '2025-02'})
+        self.assertEqual(response.json(), {
+            'jobs': {'labels': ['2025-02'], 'datasets': [{'label': 'Vagas por mês', 'data': [1]}]}
+        })
+
+        self.assertEqual(self.client.get(reverse('jobs:reports_data'), {'series': 'salarios'}).status_code, 400)
+        response = self.client.get(reverse('jobs:reports_data'), {'start': '02/2025'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_reports_data_scoped_with_etag(self):
+        """Relatórios mostram só a empresa logada e respondem 304 enquanto os dados não mudam."""
+        other_user = User.objects.create_user(email='outra@empresa.com', password='StrongPass!123')
+        other_company = Company.objects.create(user=other_user, name='Outra Empresa')
+        job_data = {
+            'salary_band': Job.SalaryBand.FROM_1K_TO_2K,
+            'min_education': Job.MinEducation.MEDIO,
+            'requirements': 'Requisitos',
+            'created_at': timezone.datetime(2025, 1, 10, tzinfo=timezone.utc)
+        }
+        Job.objects.create(company=self.company, title='Minha vaga', **job_data)
+        Job.objects.create(company=other_company, title='Outra vaga', **job_data)
+        Job.objects.create(company=other_company, title='Outra vaga 2', **job_data)
+
+        self.client.login(email='empresa@teste.com', password='StrongPass!123')
+        url = reverse('jobs:reports_data')
+        response = self.client.get(url)
+        self.assertEqual(response.json()['jobs']['datasets'][0]['data'], [1])
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.create(company=other_company, title='Outra vaga 3', **job_data)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.create(company=self.company, title='Minha vaga 2', **job_data)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['jobs']['datasets'][0]['data'], [2])
+
+        self.client.login(email='candidato@teste.com', password='StrongPass!123')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_job_search_ranks_filters_and_follows_writes(self):
+        """Busca textual: relevância, filtros, acentos e sincronização com edições/remoções."""
+        def create(title, requirements, band=Job.SalaryBand.FROM_1K_TO_2K):
+            return Job.objects.create(
+                company=self.company,
+                title=title,
+                salary_band=band,
+                min_education=Job.MinEducation.MEDIO,
+                requirements=requirements
+            )
+
+        in_requirements = create('Analista de Dados', 'Conhecimento em Python e SQL.')
+        in_title = create('Desenvolvedor Python', 'Experiência com APIs.')
+        other_band = create('Python Sênior', 'Python avançado.', band=Job.SalaryBand.ABOVE_3K)
+        create('Designer', 'Figma e criatividade.')
+
+        url = reverse('jobs:job_search')
+        response = self.client.get(url, {'q': 'python'})
+        self.assertEqual(response.status_code, 200)
+        results = list(response.context['jobs'])
+        self.assertEqual(set(results), {in_requirements, in_title, other_band})
+        self.assertEqual(results[-1], in_requirements)
+
+        response = self.client.get(url, {'q': 'python', 'salary_band': Job.SalaryBand.ABOVE_3K})
+        self.assertEqual(list(response.context['jobs']), [other_band])
+
+        response = self.client.get(url, {'q': 'senior'})
+        self.assertEqual(list(response.context['jobs']), [other_band])
+
+        # O cache da lista é invalidado no commit das alterações.
+        with self.captureOnCommitCallbacks(execute=True):
+            in_title.title = 'Desenvolvedor Go'
+            in_title.requirements = 'Go e Kubernetes.'
+            in_title.save()
+            other_band.delete()
+        response = self.client.get(url, {'q': 'python'})
+        self.assertEqual(list(response.context['jobs']), [in_requirements])
+
+        response = self.client.get(url, {'salary_band': Job.SalaryBand.FROM_1K_TO_2K})
+        self.assertEqual(len(response.context['jobs']), 3)
+
+    def test_job_board_cache_and_invalidation(self):
+        """Lista pública servida do cache e invalidada por vagas e candidaturas novas."""
+        def requests(layer, result):
+            totals = metrics.REGISTRY.collect()
+            return totals.get(('jobs_board_cache_requests_total', (layer, result)), [0])[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job = Job.objects.create(
+                company=self.company,
+                title='Vaga Cacheada',
+                salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+                min_education=Job.MinEducation.MEDIO,
+                requirements='Requisitos teste'
+            )
+        url = reverse('jobs:job_list')
+        hits = requests('html', 'hit')
+        self.assertContains(self.client.get(url), 'Vaga Cacheada')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, '<strong>Candidatos:</strong> 0')
+        self.assertEqual(requests('html', 'hit'), hits + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.create(job=job, candidate=self.candidate, salary_expectation=1500,
+                                       candidate_last_education=Candidate.Education.MEDIO)
+        self.assertContains(self.client.get(url), '<strong>Candidatos:</strong> 1')
+
+        # Usuários logados reaproveitam a página de vagas, mas a resposta é renderizada para eles.
+        self.client.login(email='empresa@teste.com', password='StrongPass!123')
+        response = self.client.get(url)
+        self.assertContains(response, 'Criar nova vaga')
+        self.assertEqual(list(response.context['jobs']), [job])
+        page_hits = requests('page', 'hit')
+        self.client.get(url)
+        self.assertEqual(requests('page', 'hit'), page_hits + 1)
+
+    def test_job_search_cursor_pagination(self):
+        """Resultados da busca usam a mesma paginação por cursor, mantendo os filtros."""
+        for i in range(25):
+            Job.objects.create(
+                company=self.company,
+                title=f'Vaga Django {i}',
+                salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+                min_education=Job.MinEducation.MEDIO,
+                requirements='Django ' * (i % 3 + 1)
+            )
+
+        url = reverse('jobs:job_search')
+        response = self.client.get(url, {'q': 'django'})
+        first_page = list(response.context['jobs'])
+        self.assertEqual(len(first_page), 20)
+        self.assertIn('q=django', response.context['cursor_query'])
+
+        response = self.client.get(url, {'q': 'django', 'cursor': response.context['page_obj'].next_cursor})
+        second_page = list(response.context['jobs'])
+        self.assertEqual(len(second_page), 5)
+        self.assertFalse(set(first_page) & set(second_page))
+
+        response = self.client.get(url, {'q': 'django', 'cursor': response.context['page_obj'].previous_cursor})
+        self.assertEqual(list(response.context['jobs']), first_page)
+
+    def test_job_recommendations_for_candidate(self):
+        """"Vagas para você": ordena por escolaridade/salário e similaridade, sem vagas já aplicadas."""
+        def create(title, requirements, min_education=Job.MinEducation.MEDIO, band=Job.SalaryBand.FROM_1K_TO_2K):
+            return Job.objects.create(
+                company=self.company,
+                title=title,
+                salary_band=band,
+                min_education=min_education,
+                requirements=requirements
+            )
+
+        self.candidate.experience = 'Desenvolvimento web com Python e Django.'
+        self.candidate.save()
+        best = create('Dev Django', 'Python e Django.')
+        partial = create('Dev Python', 'Python e pandas.')
+        overqualified = create('Dev Django Sênior', 'Python e Django.', min_education=Job.MinEducation.DOUTORADO)
+        create('Designer', 'Figma e criatividade.')
+        applied = create('Dev Django Pleno', 'Django e Python.')
+        Application.objects.create(job=applied, candidate=self.candidate, salary_expectation=1500,
+                                   candidate_last_education=Candidate.Education.MEDIO)
+
+        url = reverse('jobs:job_recommendations')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.login(email='empresa@teste.com', password='StrongPass!123')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.login(email='candidato@teste.com', password='StrongPass!123')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['jobs']), [best, partial, overqualified])
+        self.assertContains(response, 'Vagas para você')
+
+        partial.requirements = 'Figma.'
+        partial.save()
+        response = self.client.get(url)
+        self.assertEqual(list(response.context['jobs']), [best, overqualified])
+
+        # Cada termo da experiência ('python', 'django') lê no máximo MAX_POSTINGS entradas do índice.
+        with mock.patch('jobs.recommendations.MAX_POSTINGS', 1):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['jobs']), 1)
+
+    def test_top_candidates_api(self):
+        """Top K por pontuação com desempate por data, paginado por cursor, e contagem por pontuação."""
+        job = Job.objects.create(
+            company=self.company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+        start = timezone.now()
+        expected = []
+        for i, (salary, education) in enumerate([(5000, 1), (1500, 2), (5000, 2), (1500, 2), (1500, 1)]):
+            user = User.objects.create_user(email=f'c{i}@teste.com', password='StrongPass!123')
+            candidate = Candidate.objects.create(user=user, last_education=education)
+            Application.objects.create(
+                job=job,
+                candidate=candidate,
+                salary_expectation=salary,
+                candidate_last_education=education,
+                created_at=start + timezone.timedelta(minutes=i)
+            )
+            expected.append(candidate.pk)
+        # Pontuações: 0, 2, 1, 2, 1.
+        expected = [expected[1], expected[3], expected[2], expected[4], expected[0]]
+
+        url = reverse('jobs:top_candidates', args=[job.pk])
+        self.client.login(email='candidato@teste.com', password='StrongPass!123')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.login(email='empresa@teste.com', password='StrongPass!123')
+        data = self.client.get(url, {'limit': 2}).json()
+        self.assertEqual(data['score_counts'], {'0': 1, '1': 2, '2': 2})
+        self.assertEqual([row['candidate'] for row in data['results']], expected[:2])
+        self.assertIsNone(data['previous'])
+
+        seen = []
+        cursor = data['next']
+        while cursor:
+            data = self.client.get(url, {'limit': 2, 'cursor': cursor}).json()
+            seen.extend(row['candidate'] for row in data['results'])
+            cursor = data['next']
+        self.assertEqual(seen, expected[2:])
+
+        data = self.client.get(url, {'limit': 2, 'cursor': data['previous']}).json()
+        self.assertEqual([row['candidate'] for row in data['results']], expected[2:4])
+        self.assertEqual(self.client.get(url, {'limit': 'x'}).status_code, 400)
+
+        response = self.client.get(reverse('jobs:candidate_list', args=[job.pk]))
+        self.assertEqual([a.candidate_id for a in response.context['applications']], expected)
+        self.assertContains(response, 'Pontuação 2: 2')
+
+    def test_job_detail_and_candidate_list_query_budget(self):
+        """Detalhe da vaga e lista de candidatos fazem um número fixo de consultas, qualquer que seja o volume."""
+        job = Job.objects.create(
+            company=self.company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+
+        def add_applications(count):
+            start = Application.objects.count()
+            for i in range(start, start + count):
+                user = User.objects.create_user(email=f'c{i}@teste.com', password='StrongPass!123')
+                candidate = Candidate.objects.create(user=user, last_education=Candidate.Education.MEDIO)
+                Application.objects.create(job=job, candidate=candidate, salary_expectation=1500,
+                                           candidate_last_education=Candidate.Education.MEDIO)
+
+        detail_url = reverse('jobs:job_detail', args=[job.pk])
+        list_url = reverse('jobs:candidate_list', args=[job.pk])
+        for count in (2, 25):
+            add_applications(count)
+            with self.subTest(applications=Application.objects.count()):
+                self.client.login(email='empresa@teste.com', password='StrongPass!123')
+                # Sessão, usuário + perfis, vaga + empresa, candidatos.
+                with self.assertNumQueries(4):
+                    self.client.get(detail_url)
+                # Sessão, usuário + perfis, vaga, contagem por pontuação, página de candidatos.
+                with self.assertNumQueries(5):
+                    self.client.get(list_url)
+
+                self.client.login(email='candidato@teste.com', password='StrongPass!123')
+                # Sessão, usuário + perfis, vaga + empresa, has_applied.
+                with self.assertNumQueries(4):
+                    self.client.get(detail_url)
+
+    def test_apply_post_is_idempotent(self):
+        """Reenviar a candidatura não dá erro 500 nem altera a candidatura existente."""
+        job = Job.objects.create(
+            company=self.company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+        self.client.login(email='candidato@teste.com', password='StrongPass!123')
+        url = reverse('jobs:apply', args=[job.pk])
+        for salary in (1500, 9000):
+            response = self.client.post(url, {
+                'salary_expectation': salary,
+                'candidate_last_education': Candidate.Education.MEDIO,
+                'candidate_experience': '',
+            })
+            self.assertRedirects(response, reverse('jobs:job_detail', args=[job.pk]))
+
+        application = Application.objects.get(job=job)
+        self.assertEqual(application.salary_expectation, 1500)
+        self.assertEqual(application.score, 2)
+        job.refresh_from_db()
+        self.assertEqual(job.applications_count, 1)
+
+    def test_application_import_upload(self):
+        """Upload em CSV: importa as válidas, pontua, ignora repetidas e reporta erros por linha."""
+        job = Job.objects.create(
+            company=self.company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+        other_user = User.objects.create_user(email='outra@empresa.com', password='StrongPass!123')
+        other_job = Job.objects.create(
+            company=Company.objects.create(user=other_user, name='Outra Empresa'),
+            title='Vaga Outra Empresa',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+        second_user = User.objects.create_user(email='segundo@teste.com', password='StrongPass!123')
+        second = Candidate.objects.create(user=second_user, last_education=Candidate.Education.FUNDAMENTAL)
+
+        content = '\n'.join([
+            'job_id,email,salary_expectation,candidate_last_education,created_at',
+            f'{job.pk},candidato@teste.com,1500,,2025-01-10T10:00:00',
+            f'{job.pk},segundo@teste.com,5000,,',
+            f'{job.pk},candidato@teste.com,1500,,',
+            f'{job.pk},ninguem@teste.com,1500,,',
+            f'{other_job.pk},candidato@teste.com,1500,,',
+            f'{job.pk},segundo@teste.com,abc,,',
+        ])
+        upload = SimpleUploadedFile('candidaturas.csv', content.encode())
+
+        url = reverse('jobs:application_import')
+        self.client.login(email='candidato@teste.com', password='StrongPass!123')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.login(email='empresa@teste.com', password='StrongPass!123')
+        response = self.client.post(url, {'file': upload})
+        result = response.context['result']
+        self.assertEqual((result.created, result.duplicates, result.error_count), (2, 1, 3))
+        self.assertEqual([line for line, _ in result.errors], [5, 6, 7])
+
+        self.assertEqual(Application.objects.get(job=job, candidate=self.candidate).score, 2)
+        self.assertEqual(Application.objects.get(job=job, candidate=second).score, 0)
+        job.refresh_from_db()
+        self.assertEqual(job.applications_count, 2)
+        self.assertFalse(other_job.applications.exists())
+
+    async def test_async_json_endpoints(self):
+        """Lista em JSON e relatórios servidos como views async, pelo handler ASGI."""
+        for i in range(JobListView.paginate_by + 1):
+            await Job.objects.acreate(
+                company=self.company,
+                title=f'Vaga {i}',
+                salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+                min_education=Job.MinEducation.MEDIO,
+                requirements='Requisitos teste',
+                created_at=timezone.datetime(2025, 1, 2 + i, tzinfo=timezone.utc)
+            )
+        client = AsyncClient()
+
+        response = await client.get(reverse('jobs:job_list_data'))
+        data = response.json()
+        self.assertEqual(len(data['results']), JobListView.paginate_by)
+        self.assertEqual(data['results'][0]['title'], f'Vaga {JobListView.paginate_by}')
+        self.assertEqual(data['results'][0]['company'], 'Empresa Teste')
+        self.assertIsNone(data['previous'])
+        response = await client.get(reverse('jobs:job_list_data'), {'cursor': data['next']})
+        self.assertEqual([job['title'] for job in response.json()['results']], ['Vaga 0'])
+        self.assertEqual((await client.get(reverse('jobs:job_list_data'), {'cursor': 'x'})).status_code, 404)
+
+        url = reverse('jobs:jobs_per_month')
+        response = await client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse('accounts:login')))
+
+        await sync_to_async(client.force_login)(self.candidate_user)
+        self.assertEqual((await client.get(url)).status_code, 404)
+
+        await sync_to_async(client.force_login)(self.company_user)
+        response = await client.get(url)
+        self.assertEqual(response.json()['datasets'][0]['data'], [JobListView.paginate_by + 1])
+        response = await client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_export_applications_streams_csv_and_jsonl(self):
+        """Exportação por vaga e da empresa toda, em CSV e JSONL, sem expor outras empresas."""
+        job = Job.objects.create(
+            company=self.company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+        other_user = User.objects.create_user(email='outra@empresa.com', password='StrongPass!123')
+        other_job = Job.objects.create(
+            company=Company.objects.create(user=other_user, name='Outra Empresa'),
+            title='Vaga Outra Empresa',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+        second_user = User.objects.create_user(email='segundo@teste.com', password='StrongPass!123')
+        second = Candidate.objects.create(user=second_user, last_education=Candidate.Education.FUNDAMENTAL)
+        for target, candidate, salary in ((job, self.candidate, 1500), (job, second, 5000), (other_job, second, 1500)):
+            Application.objects.create(job=target, candidate=candidate, salary_expectation=salary,
+                                       candidate_last_education=candidate.last_education)
+
+        url = reverse('jobs:candidate_export', args=[job.pk])
+        self.client.login(email='candidato@teste.com', password='StrongPass!123')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.login(email='empresa@teste.com', password='StrongPass!123')
+        self.assertEqual(self.client.get(reverse('jobs:candidate_export', args=[other_job.pk])).status_code, 404)
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code, 400)
+
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="candidaturas-vaga-{job.pk}.csv"')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'job_id,job_title,email,salary_expectation,candidate_last_education,'
+                                   'candidate_experience,score,created_at')
+        # Maior pontuação primeiro, como na lista de candidatos.
+        self.assertEqual([line.split(',')[2:4] for line in lines[1:]],
+                         [['candidato@teste.com', '1500.00'], ['segundo@teste.com', '5000.00']])
+
+        response = self.client.get(reverse('jobs:application_export'), {'format': 'jsonl'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(sorted((row['job_title'], row['email'], row['score']) for row in rows),
+                         [('Vaga Teste', 'candidato@teste.com', 2), ('Vaga Teste', 'segundo@teste.com', 0)])
+
+    def test_card_fragments_follow_what_the_cards_show(self):
+        """A grade de cards fica em cache e muda com a pontuação, mesmo alterada em lote."""
+        job = Job.objects.create(
+            company=self.company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+        Application.objects.create(job=job, candidate=self.candidate, salary_expectation=1500,
+                                   candidate_last_education=Candidate.Education.MEDIO)
+        url = reverse('jobs:candidate_list', args=[job.pk])
+        self.client.login(email='empresa@teste.com', password='StrongPass!123')
+        self.assertContains(self.client.get(url), 'Pontuação: 2')
+
+        Application.objects.filter(job=job).update(score=0)
+        self.assertContains(self.client.get(url), 'Pontuação: 0')
+        User.objects.filter(pk=self.candidate_user.pk).update(email='novo@teste.com')
+        self.assertContains(self.client.get(url), 'novo@teste.com')
+
+    def test_production_settings_use_cached_template_loader(self):
+        with mock.patch.dict(os.environ, {'DJANGO_SECRET_KEY': 'segredo', 'DJANGO_ALLOWED_HOSTS': 'a.com,b.com'}):
+            production = importlib.reload(importlib.import_module('jobconvo_enock.settings_production'))
+        self.assertFalse(production.DEBUG)
+        self.assertEqual(production.ALLOWED_HOSTS, ['a.com', 'b.com'])
+        options = production.TEMPLATES[0]['OPTIONS']
+        self.assertEqual(options['loaders'][0][0], 'django.template.loaders.cached.Loader')
+        self.assertFalse(production.TEMPLATES[0]['APP_DIRS'])
+        self.assertIn('django.contrib.auth.context_processors.auth', options['context_processors'])
+
+    def test_request_profiling_middleware(self):
+        """Com REQUEST_PROFILING ligado, cada resposta traz Server-Timing e perfis lentos são gravados com rotação."""
+        self.assertNotIn('Server-Timing', self.client.get(reverse('jobs:job_list')))
+
+        with tempfile.TemporaryDirectory() as profile_dir:
+            config = {'enabled': True, 'trace_memory': True, 'profile_rate': 1.0,
+                      'profile_threshold_ms': 0, 'profile_dir': profile_dir, 'profile_keep': 1}
+            with override_settings(REQUEST_PROFILING=config):
+                client = Client()
+                client.get(reverse('jobs:job_list'))
+                response = client.get(reverse('jobs:job_list'))
+
+            timing = response['Server-Timing']
+            self.assertRegex(timing, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", render;dur=[\d.]+')
+            self.assertIn('view;desc="jobs:job_list"', timing)
+            self.assertIn('KiB peak', timing)
+            self.assertEqual(len(os.listdir(profile_dir)), 1)
+
+    def test_metrics_endpoint(self):
+        """/metrics expõe latência por URL, candidaturas, logins e soma os arquivos de outros processos."""
+        job = Job.objects.create(
+            company=self.company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            config = {'dir': metrics_dir, 'flush_interval': 0, 'allowed_ips': ['127.0.0.1']}
+            with override_settings(METRICS=config):
+                self.client.get(reverse('jobs:job_list'))
+                self.client.login(email='candidato@teste.com', password='StrongPass!123')
+                self.client.post(reverse('jobs:apply', args=[job.pk]), {
+                    'salary_expectation': 1500,
+                    'candidate_last_education': Candidate.Education.MEDIO,
+                    'candidate_experience': '',
+                })
+                self.assertIn(f'{metrics.REGISTRY.name}.json', os.listdir(metrics_dir))
+
+                with open(os.path.join(metrics_dir, '1.json'), 'w') as f:
+                    json.dump([['jobs_applications_created_total', ['2'], [1000]]], f)
+                response = self.client.get('/metrics')
+
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertRegex(body, r'http_request_duration_seconds_bucket\{view="jobs:job_list",method="GET",le="\+Inf"\} [1-9]')
+        self.assertRegex(body, r'http_request_queries_count\{view="jobs:apply"\} [1-9]')
+        self.assertRegex(body, r'jobs_applications_created_total\{score="2"\} 10\d\d')
+        self.assertRegex(body, r'accounts_logins_total [1-9]')
+
+        # Fechado por padrão: só com o token ou de um endereço liberado.
+        with override_settings(METRICS={}):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(METRICS={'token': 'segredo'}):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer segredo').status_code, 200)
+        with override_settings(METRICS={'allowed_ips': ['10.0.0.0/8']}):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 200)
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 403)
+
+    def test_metrics_adopts_files_of_dead_processes(self):
+        """Arquivos de processos mortos (inclusive de um pid reaproveitado) são somados e apagados na primeira gravação."""
+        def created(totals):
+            return totals.get(('jobs_applications_created_total', ('9',)), [0])[0]
+
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            dead = {
+                # pid acima do máximo do sistema: nenhum processo com ele.
+                f'{2 ** 30}-antigo.json': [['jobs_applications_created_total', ['9'], [5]]],
+                f'{os.getpid()}-antigo.json': {'rows': [['jobs_applications_created_total', ['9'], [7]]], 'adopted': []},
+            }
+            for name, data in dead.items():
+                with open(os.path.join(metrics_dir, name), 'w') as f:
+                    json.dump(data, f)
+
+            with override_settings(METRICS={'dir': metrics_dir, 'flush_interval': 0}):
+                before = created(metrics.REGISTRY.collect())
+                self.assertEqual(before, created(metrics.REGISTRY.collect()))
+                metrics.REGISTRY.flush()
+                self.assertEqual(os.listdir(metrics_dir), [f'{metrics.REGISTRY.name}.json'])
+                self.assertEqual(created(metrics.REGISTRY.collect()), before)
+
+                with open(os.path.join(metrics_dir, f'{metrics.REGISTRY.name}.json')) as f:
+                    rows = json.load(f)['rows']
+                self.assertIn(['jobs_applications_created_total', ['9'], [12]], rows)
+
+
+class ConcurrentApplyTest(TransactionTestCase):
+    """Envios simultâneos (inclusive repetidos) da candidatura não geram erro 500 nem duplicatas."""
+
+    WORKERS = 8
+    CANDIDATES = 20
+    SUBMISSIONS_PER_CANDIDATE = 3
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # O SQLite em memória (cache compartilhado) recusa escritas concorrentes na hora, sem esperar.
+            # settings.py usa um arquivo para o banco de testes; isto só vale se alguém o trocar.
+            self.skipTest('Requer PostgreSQL ou SQLite em arquivo (DATABASES TEST NAME).')
+        company_user = User.objects.create_user(email='empresa@teste.com', password='StrongPass!123')
+        company = Company.objects.create(user=company_user, name='Empresa Teste')
+        self.job = Job.objects.create(
+            company=company,
+            title='Vaga Teste',
+            salary_band=Job.SalaryBand.FROM_1K_TO_2K,
+            min_education=Job.MinEducation.MEDIO,
+            requirements='Requisitos teste'
+        )
+        self.users = []
+        for i in range(self.CANDIDATES):
+            user = User.objects.create_user(email=f'c{i}@teste.com', password='StrongPass!123')
+            Candidate.objects.create(user=user, last_education=Candidate.Education.MEDIO)
+            self.users.append(user)
+
+    def submit(self, user):
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        started = time.perf_counter()
+        try:
+            response = client.post(reverse('jobs:apply', args=[self.job.pk]), {
+                'salary_expectation': 1500,
+                'candidate_last_education': Candidate.Education.MEDIO,
+                'candidate_experience': '',
+            })
+            return response.status_code, time.perf_counter() - started
+        finally:
+            connection.close()
+
+    def test_concurrent_duplicate_submissions(self):
+        submissions = [user for user in self.users for _ in range(self.SUBMISSIONS_PER_CANDIDATE)]
+        with ThreadPoolExecutor(self.WORKERS) as pool:
+            results = list(pool.map(self.submit, submissions))
+
+        self.assertEqual({status for status, _ in results}, {302})
+        self.assertLess(max(elapsed for _, elapsed in results), 5)
+        self.assertEqual(Application.objects.filter(job=self.job).count(), self.CANDIDATES)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.applications_count, self.CANDIDATES)
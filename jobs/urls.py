@@ -5,6 +5,9 @@ app_name = 'jobs'
 
 urlpatterns = [
   path('', views.JobListView.as_view(), name='job_list'),
+  path('jobs/data/', views.job_list_data, name='job_list_data'),
+  path('jobs/search/', views.JobSearchView.as_view(), name='job_search'),
+  path('jobs/for-you/', views.RecommendedJobListView.as_view(), name='job_recommendations'),
   path('my-jobs/', views.MyJobListView.as_view(), name='my_jobs'),
   path('jobs/create/', views.JobCreateView.as_view(), name='job_create'),
   path('jobs/<int:pk>/', views.JobDetailView.as_view(), name='job_detail'),
@@ -12,11 +15,16 @@ urlpatterns = [
   path('jobs/<int:pk>/delete/', views.JobDeleteView.as_view(), name='job_delete'),
 
   path('jobs/<int:pk>/apply/', views.ApplyView.as_view(), name='apply'),
+  path('applications/import/', views.ImportApplicationsView.as_view(), name='application_import'),
+  path('applications/export/', views.export_applications, name='application_export'),
 
   path('jobs/<int:job_pk>/candidates/', views.CandidateListView.as_view(), name='candidate_list'),
+  path('jobs/<int:job_pk>/candidates/top/', views.top_candidates, name='top_candidates'),
+  path('jobs/<int:job_pk>/candidates/export/', views.export_job_applications, name='candidate_export'),
   path('candidates/<int:pk>/', views.CandidateDetailView.as_view(), name='candidate_detail'),
 
   path('reports/', views.reports, name='reports'),
+  path('reports/data/', views.reports_data, name='reports_data'),
   path('reports/data/jobs-per-month/', views.jobs_per_month, name='jobs_per_month'),
   path('reports/data/apps-per-month/', views.apps_per_month, name='apps_per_month'),
   path('reports/data/candidates-per-month/', views.candidates_per_month, name='candidates_per_month'),
@@ -1,39 +1,67 @@
+import csv
+import io
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Count
-from django.db.models.functions import TruncMonth
-from django.http import JsonResponse, Http404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.views import View
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView
 
 from accounts.models import Company, Candidate
+from accounts.roles import candidate_of, company_of
 from .models import Job, Application
-from .forms import JobForm, ApplicationForm
+from . import board, reports as report_data
+from .applications import export_rows, import_applications, read_rows, submit as submit_application
+from .forms import JobForm, JobSearchForm, ApplicationForm, ApplicationImportForm
+from .pagination import (
+  CursorPaginationMixin, apaginate, paginate, recent_first, recent_first_key, top_scored, top_scored_key
+)
+from .scoring import compile_rules, get_rules, rescore, score_counts
+from .search import search_fetch, search_key
+from .recommendations import recommend
+
+# Candidatos exibidos no detalhe da vaga e tamanho padrão/máximo de página da API.
+TOP_CANDIDATES = 10
+MAX_TOP_CANDIDATES = 100
 
 class CompanyRequiredMixin(UserPassesTestMixin):
   def test_func(self):
-    return hasattr(self.request.user, 'company')
+    return company_of(self.request.user) is not None
   
 class CandidateRequiredMixin(UserPassesTestMixin):
   def test_func(self):
-    return hasattr(self.request.user, 'candidate')
+    return candidate_of(self.request.user) is not None
   
-class CandidateListView(LoginRequiredMixin, CompanyRequiredMixin, ListView):
+class CandidateListView(LoginRequiredMixin, CompanyRequiredMixin, CursorPaginationMixin, ListView):
     model = Application
     template_name = 'jobs/candidate_list.html'
     context_object_name = 'applications'
 
     def get_queryset(self):
-        job = get_object_or_404(Job, pk=self.kwargs['job_pk'])
-        if job.company != self.request.user.company:
+        self.job = get_object_or_404(Job, pk=self.kwargs['job_pk'])
+        if self.job.company_id != company_of(self.request.user).pk:
             raise Http404("Você não tem permissão para ver estes candidatos.")
-        return job.applications.select_related('candidate', 'candidate__user').order_by('-score')
+        return self.job.applications.select_related('candidate', 'candidate__user')
+
+    def get_cursor_fetch(self, queryset):
+        return top_scored(queryset)
+
+    def get_cursor_key(self, obj):
+        return top_scored_key(obj)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['job'] = get_object_or_404(Job, pk=self.kwargs['job_pk'])
+        context['job'] = self.job
+        context['score_counts'] = score_counts(self.job.applications.all())
         return context
 
 class CandidateDetailView(LoginRequiredMixin, CompanyRequiredMixin, DetailView):
@@ -42,43 +70,112 @@ class CandidateDetailView(LoginRequiredMixin, CompanyRequiredMixin, DetailView):
     context_object_name = 'candidate'
 
     def get_object(self, queryset=None):
-        candidate = get_object_or_404(Candidate, pk=self.kwargs['pk'])
-        # Check if candidate has applied to any job of the company
-        if not Application.objects.filter(candidate=candidate, job__company=self.request.user.company).exists():
+        candidate = get_object_or_404(Candidate.objects.select_related('user'), pk=self.kwargs['pk'])
+        # Só as candidaturas às vagas da empresa, com a vaga já carregada.
+        self.applications = list(candidate.applications
+                                 .filter(job__company=company_of(self.request.user))
+                                 .select_related('job'))
+        if not self.applications:
             raise Http404("Você não tem permissão para ver este candidato.")
         return candidate
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['applications'] = self.applications
+        return context
+
   
-class MyJobListView(LoginRequiredMixin, ListView):
+class MyJobListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Job
     template_name = 'jobs/job_list.html'
     context_object_name = 'jobs'
 
     def get_queryset(self):
-        if hasattr(self.request.user, 'company'):
-            return Job.objects.filter(company=self.request.user.company).annotate(app_count=Count('applications')).order_by('-created_at')
+        company = company_of(self.request.user)
+        if company is not None:
+            return Job.objects.filter(company=company)
         return Job.objects.none()
 
-class JobListView(ListView):
+class JobBoardCacheMixin:
+  """
+  Cache de jobs.board para a lista pública: a página de vagas para todos e,
+  para visitantes anônimos, a resposta inteira, sem consultar nem renderizar.
+  """
+  def get(self, request, *args, **kwargs):
+    self.board_key = board.key(request.resolver_match.view_name, request.GET)
+    if request.user.is_authenticated:
+      return super().get(request, *args, **kwargs)
+
+    html_key = f'{self.board_key}:html'
+    content = board.get(html_key, 'html')
+    if content is not None:
+      return HttpResponse(content)
+    response = super().get(request, *args, **kwargs)
+    response.add_post_render_callback(lambda response: board.set(html_key, response.content))
+    return response
+
+  def paginate_queryset(self, queryset, page_size):
+    page_key = f'{self.board_key}:page'
+    paginated = board.get(page_key, 'page')
+    if paginated is None:
+      paginated = super().paginate_queryset(queryset, page_size)
+      board.set(page_key, paginated)
+    return paginated
+
+class JobListView(JobBoardCacheMixin, CursorPaginationMixin, ListView):
   model = Job
   template_name = 'jobs/job_list.html'
   context_object_name = 'jobs'
 
   def get_queryset(self):
-    return Job.objects.all().annotate(app_count=Count('applications')).order_by('-created_at')
-  
-class JobDetailView(DetailView):
+    return Job.objects.all()
+
+  def get_context_data(self, **kwargs):
+    context = super().get_context_data(**kwargs)
+    context['search_form'] = JobSearchForm()
+    return context
+
+class JobSearchView(JobBoardCacheMixin, CursorPaginationMixin, ListView):
   model = Job
-  template_name = 'jobs/job_detail.html'
-  context_object_name = 'job'
+  template_name = 'jobs/job_list.html'
+  context_object_name = 'jobs'
+
+  def get(self, request, *args, **kwargs):
+    self.form = JobSearchForm(request.GET)
+    self.form.is_valid()
+    # Filtros inválidos são ignorados, como se não tivessem sido informados.
+    self.text = self.form.cleaned_data.get('q', '').strip()
+    self.filters = {
+      name: self.form.cleaned_data[name]
+      for name in ('salary_band', 'min_education')
+      if self.form.cleaned_data.get(name)
+    }
+    return super().get(request, *args, **kwargs)
+
+  def get_queryset(self):
+    return Job.objects.filter(**self.filters)
+
+  def get_cursor_fetch(self, queryset):
+    if self.text:
+      return search_fetch(self.text, **self.filters)
+    return super().get_cursor_fetch(queryset)
+
+  def get_cursor_key(self, obj):
+    return search_key(obj) if self.text else super().get_cursor_key(obj)
 
   def get_context_data(self, **kwargs):
     context = super().get_context_data(**kwargs)
-    
-    if hasattr(self.request.user, 'company') and self.object.company == self.request.user.company:
-      context['applications'] = self.object.applications.all().order_by('-score')
-      
+    context['search_form'] = self.form
     return context
+  
+class RecommendedJobListView(LoginRequiredMixin, CandidateRequiredMixin, ListView):
+  model = Job
+  template_name = 'jobs/job_list.html'
+  context_object_name = 'jobs'
+  extra_context = {'list_title': 'Vagas para você'}
+
+  def get_queryset(self):
+    return recommend(candidate_of(self.request.user))
 
 class JobCreateView(LoginRequiredMixin, CompanyRequiredMixin, CreateView):
   model = Job
@@ -86,7 +183,7 @@ class JobCreateView(LoginRequiredMixin, CompanyRequiredMixin, CreateView):
   template_name = 'jobs/job_form.html'
 
   def form_valid(self, form):
-    form.instance.company = self.request.user.company
+    form.instance.company = company_of(self.request.user)
     return super().form_valid(form)
   
   def get_success_url(self):
@@ -98,7 +195,14 @@ class JobUpdateView(LoginRequiredMixin, CompanyRequiredMixin, UpdateView):
   template_name = 'jobs/job_form.html'
 
   def get_queryset(self):
-    return Job.objects.filter(company=self.request.user.company)
+    return Job.objects.filter(company=company_of(self.request.user))
+
+  def form_valid(self, form):
+    response = super().form_valid(form)
+    # Pontuações dependem da faixa salarial, da escolaridade mínima e, com peso por palavras-chave, dos requisitos.
+    if compile_rules(get_rules()).job_fields & set(form.changed_data):
+      rescore(self.object.applications.all())
+    return response
 
   def get_success_url(self):
     return reverse_lazy('jobs:job_detail', kwargs={'pk': self.object.pk})
@@ -109,22 +213,31 @@ class JobDeleteView(LoginRequiredMixin, CompanyRequiredMixin, DeleteView):
   template_name = 'jobs/job_confirm_delete.html'
 
   def get_queryset(self):
-    return Job.objects.filter(company=self.request.user.company)
+    return Job.objects.filter(company=company_of(self.request.user))
 
 class JobDetailView(DetailView):
     model = Job
     template_name = 'jobs/job_detail.html'
     context_object_name = 'job'
 
+    def get_queryset(self):
+        return Job.objects.select_related('company')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
 
-        if hasattr(user, 'company') and self.object.company == user.company:
-            context['applications'] = self.object.applications.all().order_by('-score')
+        company = company_of(user)
+        candidate = candidate_of(user)
 
-        if hasattr(user, 'candidate'):
-            context['has_applied'] = self.object.applications.filter(candidate=user.candidate).exists()
+        # Comparar pelo id evita recarregar a empresa da vaga.
+        context['is_owner'] = company is not None and self.object.company_id == company.pk
+        if context['is_owner']:
+            # Só os melhores; a lista completa fica paginada em CandidateListView.
+            applications = self.object.applications.select_related('candidate__user')
+            context['applications'] = top_scored(applications)(None, False, TOP_CANDIDATES)
+        elif candidate is not None:
+            context['has_applied'] = self.object.applications.filter(candidate=candidate).exists()
 
         return context
 
@@ -132,11 +245,10 @@ class ApplyView(LoginRequiredMixin, View):
     def get(self, request, pk):
         job = get_object_or_404(Job, pk=pk)
 
-        if not hasattr(request.user, 'candidate'):
+        candidate = candidate_of(request.user)
+        if candidate is None:
             raise Http404("Only candidates can apply.")
 
-        candidate = request.user.candidate
-
         if Application.objects.filter(job=job, candidate=candidate).exists():
             return redirect('jobs:job_detail', pk=job.pk)
 
@@ -150,16 +262,16 @@ class ApplyView(LoginRequiredMixin, View):
     def post(self, request, pk):
         job = get_object_or_404(Job, pk=pk)
 
-        if not hasattr(request.user, 'candidate'):
+        candidate = candidate_of(request.user)
+        if candidate is None:
             raise Http404("Only candidates can apply.")
-
-        candidate = request.user.candidate
         form = ApplicationForm(request.POST)
 
         if form.is_valid():
-            Application.objects.create(
-                job=job,
-                candidate=candidate,
+            # Idempotente: um envio repetido (duplo clique, reenvio) só volta para a vaga.
+            submit_application(
+                job,
+                candidate,
                 salary_expectation=form.cleaned_data['salary_expectation'],
                 candidate_last_education=form.cleaned_data['candidate_last_education'],
                 candidate_experience=form.cleaned_data['candidate_experience']
@@ -168,80 +280,217 @@ class ApplyView(LoginRequiredMixin, View):
 
         return render(request, 'jobs/apply.html', {'form': form, 'job': job})
 
+class ImportApplicationsView(LoginRequiredMixin, CompanyRequiredMixin, FormView):
+    form_class = ApplicationImportForm
+    template_name = 'jobs/application_import.html'
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        # O arquivo é lido linha a linha; uploads grandes já ficam em disco (TemporaryUploadedFile).
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            rows = read_rows(stream, form.cleaned_data['format'])
+            result = import_applications(company_of(self.request.user), rows)
+        except (UnicodeDecodeError, csv.Error) as error:
+            form.add_error('file', f"Arquivo ilegível ({error}); os blocos lidos antes do erro foram importados.")
+            return self.form_invalid(form)
+        return self.render_to_response(self.get_context_data(form=form, result=result))
+
 
 @login_required
 def reports(request):
-  if not hasattr(request.user, 'company'):
+  if company_of(request.user) is None:
     raise Http404("Only companies can view reports. :(")
   
   return render(request, 'jobs/reports.html')
 
-@login_required
-def apply_to_job(request, pk):
-  job = get_object_or_404(Job, pk=pk)
-
-  if not hasattr(request.user, 'candidate'):
-    raise Http404("Only candidate can apply. :(")
-  
-  candidate = request.user.candidate
-  
-  if request.method == 'POST':
-    form = ApplicationForm(request.POST)
-    if form.is_valid():
-      Application.objects.create(
-        job=job,
-        candidate=candidate,
-        salary_expectation=form.cleaned_data['salary_expectation'],
-        candidate_last_education=form.cleaned_data['candidate_last_education'],
-        candidate_experience=form.cleaned_data['candidate_experience']
-      )
-      return redirect('jobs:job_detail', pk=job.pk)
-  else:
-    form = ApplicationForm(initial={
-      'candidate_last_education': candidate.last_education,
-      'candidate_experience': candidate.experience,
-    })
-
-  return render(request, 'jobs/apply.html', {'form': form, 'job': job})
-
 
 @login_required
-def jobs_per_month(request):
-  qs = (Job.objects
-        .annotate(month=TruncMonth('created_at'))
-        .values('month')
-        .annotate(count=Count('id'))
-        .order_by('month'))
-  labels = [q['month'].strftime('%Y-%m') for q in qs]
-  data = [q['count'] for q in qs]
-  return JsonResponse({'labels': labels, 'datasets': [{'label': 'Vagas por mês', 'data': data}]})
+def top_candidates(request, job_pk):
+  """
+  Melhores candidatos de uma vaga (pontuação, depois ordem de candidatura),
+  paginados por cursor, com a contagem de candidaturas por pontuação.
+  """
+  company = company_of(request.user)
+  if company is None:
+    raise Http404("Only companies can view candidates. :(")
+  job = get_object_or_404(Job, pk=job_pk, company=company)
+
+  try:
+    limit = int(request.GET.get('limit', TOP_CANDIDATES))
+  except ValueError:
+    return JsonResponse({'error': "limit deve ser um número inteiro."}, status=400)
+  limit = max(1, min(limit, MAX_TOP_CANDIDATES))
+
+  applications = job.applications.select_related('candidate__user')
+  page = paginate(top_scored(applications), top_scored_key, request.GET.get('cursor'), limit)
+  return JsonResponse({
+    'score_counts': score_counts(job.applications.all()),
+    'results': [
+      {
+        'candidate': application.candidate_id,
+        'email': application.candidate.user.email,
+        'score': application.score,
+        'created_at': application.created_at.isoformat(),
+      }
+      for application in page
+    ],
+    'next': page.next_cursor,
+    'previous': page.previous_cursor,
+  })
+
+
+EXPORT_CONTENT_TYPES = {
+  'csv': 'text/csv; charset=utf-8',
+  'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def _async_chunks(chunks):
+  """Lê um pedaço por vez do gerador síncrono (e do cursor do banco), na thread do ORM da requisição."""
+  next_chunk = sync_to_async(next)
+  async def stream():
+    while True:
+      chunk = await next_chunk(chunks, None)
+      if chunk is None:
+        return
+      yield chunk
+  return stream()
+
+
+def _export_response(request, applications, filename):
+  """
+  Download das candidaturas em CSV ou JSONL (?format=), enviado enquanto é
+  lido do banco. Sob ASGI o conteúdo precisa ser um iterador async: um
+  síncrono seria lido inteiro antes do primeiro byte.
+  """
+  format = request.GET.get('format', 'csv')
+  if format not in EXPORT_CONTENT_TYPES:
+    return HttpResponseBadRequest(f"Formato desconhecido: {format} (use csv ou jsonl).")
+
+  chunks = export_rows(applications, format)
+  if isinstance(request, ASGIRequest):
+    chunks = _async_chunks(chunks)
+  response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[format])
+  response['Content-Disposition'] = f'attachment; filename="{filename}.{format}"'
+  return response
 
 
 @login_required
-def apps_per_month(request):
-  qs = (Application.objects
-        .annotate(month=TruncMonth('created_at'))
-        .values('month')
-        .annotate(count=Count('id'))
-        .order_by('month'))
-  labels = [q['month'].strftime('%Y-%m') for q in qs]
-  data = [q['count'] for q in qs]
-  return JsonResponse({'labels': labels, 'datasets': [{'label': 'Aplicações por mês', 'data': data}]})
+def export_job_applications(request, job_pk):
+  company = company_of(request.user)
+  if company is None:
+    raise Http404("Only companies can export candidates. :(")
+  job = get_object_or_404(Job, pk=job_pk, company=company)
+  # Mesma ordem da lista de candidatos, servida pelo índice app_job_score_idx.
+  applications = job.applications.order_by('-score', 'created_at', 'pk')
+  return _export_response(request, applications, f'candidaturas-vaga-{job.pk}')
+
 
 @login_required
-def candidates_per_month(request):
-    data = (
-        Application.objects.annotate(month=TruncMonth('created_at'))
-        .values('month')
-        .annotate(total=Count('id'))
-        .order_by('month')
-    )
-    labels = [item['month'].strftime('%Y-%m') for item in data]
-    counts = [item['total'] for item in data]
-    return JsonResponse({
-        'labels': labels,
-        'datasets': [{
-            'label': 'Candidatos por mês',
-            'data': counts
-        }]
-    })
\ No newline at end of file
+def export_applications(request):
+  company = company_of(request.user)
+  if company is None:
+    raise Http404("Only companies can export candidates. :(")
+  # Sem ORDER BY: ordenar todas as candidaturas da empresa exigiria uma ordenação
+  # completa no banco antes da primeira linha. Na prática saem agrupadas por vaga.
+  applications = Application.objects.filter(job__company=company).order_by()
+  return _export_response(request, applications, 'candidaturas')
+
+
+def _parse_month(value):
+  try:
+    return datetime.strptime(value, '%Y-%m').date() if value else None
+  except ValueError:
+    raise ValueError(f"Mês inválido: {value!r} (use AAAA-MM).")
+
+
+def _user_and_company(request):
+  """Resolve request.user e sua empresa, que consultam o banco; views async chamam via sync_to_async."""
+  user = request.user
+  if not user.is_authenticated:
+    return None, None
+  return user, company_of(user)
+
+
+def _company_report(view):
+  """
+  login_required, acesso só de empresas e ETag (como @condition) para as
+  views async de relatório, que recebem a empresa como argumento. Os
+  decorators do Django 4.2 só envolvem views síncronas.
+  """
+  @wraps(view)
+  async def wrapper(request, *args, **kwargs):
+    user, company = await sync_to_async(_user_and_company)(request)
+    if user is None:
+      return redirect_to_login(request.get_full_path())
+    if company is None:
+      raise Http404("Only companies can view reports. :(")
+
+    etag = quote_etag(await report_data.aetag(company.pk, request.get_full_path()))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+      response = await view(request, company, *args, **kwargs)
+      # Só respostas de sucesso: um 400 com ETag seria revalidado (304) para sempre.
+      if request.method in ('GET', 'HEAD') and response.status_code == 200:
+        response.headers.setdefault('ETag', etag)
+    return response
+  return wrapper
+
+
+@_company_report
+async def reports_data(request, company):
+  names = [name for name in request.GET.get('series', '').split(',') if name] or list(report_data.SERIES)
+  unknown = [name for name in names if name not in report_data.SERIES]
+  if unknown:
+    return JsonResponse({'error': f"Séries desconhecidas: {', '.join(unknown)}"}, status=400)
+
+  try:
+    start = _parse_month(request.GET.get('start'))
+    end = _parse_month(request.GET.get('end'))
+  except ValueError as error:
+    return JsonResponse({'error': str(error)}, status=400)
+
+  return JsonResponse(await report_data.abuild_series(company.pk, names, start, end))
+
+
+async def _monthly_response(company, name):
+  return JsonResponse((await report_data.abuild_series(company.pk, [name]))[name])
+
+
+@_company_report
+async def jobs_per_month(request, company):
+  return await _monthly_response(company, 'jobs')
+
+
+@_company_report
+async def apps_per_month(request, company):
+  return await _monthly_response(company, 'applications')
+
+
+@_company_report
+async def candidates_per_month(request, company):
+  return await _monthly_response(company, 'candidates')
+
+
+async def job_list_data(request):
+  """Lista pública de vagas em JSON, na mesma ordem e paginação por cursor da JobListView."""
+  page = await apaginate(recent_first(Job.objects.select_related('company')), recent_first_key,
+                         request.GET.get('cursor'), JobListView.paginate_by)
+  return JsonResponse({
+    'results': [
+      {
+        'id': job.pk,
+        'title': job.title,
+        'company': job.company.name,
+        'salary_band': job.get_salary_band_display(),
+        'min_education': job.get_min_education_display(),
+        'applications_count': job.applications_count,
+        'created_at': job.created_at.isoformat(),
+        'url': reverse('jobs:job_detail', args=[job.pk]),
+      }
+      for job in page
+    ],
+    'next': page.next_cursor,
+    'previous': page.previous_cursor,
+  })